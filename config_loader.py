@@ -0,0 +1,55 @@
+"""
+Configuration loading shared by the downloader and the helper scripts.
+
+A YAML configuration file is parsed once per process while it is unchanged,
+so a script and the SchoolPhotoDownloader it creates do not parse the same
+file twice.
+"""
+
+import os
+import functools
+from typing import Dict
+
+import yaml
+
+# libyaml's C loader parses several times faster; fall back to the pure-Python one without it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+@functools.lru_cache(maxsize=4)
+def _read_config(config_path: str, mtime: float) -> Dict:
+    """
+    Parse a YAML configuration file, reusing the result while the file is unchanged.
+    
+    Args:
+        config_path (str): Path to the configuration file
+        mtime (float): Modification time of the file; a new value forces a re-parse
+    
+    Returns:
+        Dict: Configuration dictionary
+    """
+    with open(config_path, 'r') as file:
+        return yaml.load(file, Loader=_YamlLoader)
+
+
+def load_config(config_path: str = "config.yaml") -> Dict:
+    """
+    Load configuration from a YAML file.
+    
+    The parsed configuration is shared by every caller in the process, so it
+    should be treated as read-only.
+    
+    Args:
+        config_path (str): Path to the configuration file
+    
+    Returns:
+        Dict: Configuration dictionary
+    
+    Raises:
+        FileNotFoundError: If config file doesn't exist
+        yaml.YAMLError: If config file is malformed
+    """
+    return _read_config(config_path, os.path.getmtime(config_path))
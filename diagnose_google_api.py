@@ -4,18 +4,68 @@ Google Photos API Diagnostic Tool
 This helps diagnose what's wrong with the Google Photos API setup.
 """
 
+import os
 import json
 import requests
+from datetime import datetime, timedelta
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; token writes are still atomic via os.replace
+    fcntl = None
+
 # Test scopes
 SCOPES = [
     'https://www.googleapis.com/auth/photoslibrary',
     'https://www.googleapis.com/auth/photoslibrary.appendonly'
 ]
 
+TOKEN_FILE = 'google_photos_token.json'
+
+# Refresh tokens that are this close to expiring rather than waiting for a 401
+EXPIRY_BUFFER = timedelta(seconds=60)
+
+# Parsed credentials keyed by token file path, so the JSON is only read once per process
+_TOKEN_CACHE = {}
+
+
+def load_cached_credentials(token_file=TOKEN_FILE):
+    """Load credentials from the token file, reusing an already parsed copy."""
+    creds = _TOKEN_CACHE.get(token_file)
+    if creds is None:
+        creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+        _TOKEN_CACHE[token_file] = creds
+    return creds
+
+
+def needs_refresh(creds):
+    """Return True if the credentials are expired (or about to be) and can be refreshed."""
+    if not creds.refresh_token:
+        return False
+    if creds.expiry is None:
+        return not creds.valid
+    return creds.expiry <= datetime.utcnow() + EXPIRY_BUFFER
+
+
+def save_credentials(creds, token_file=TOKEN_FILE):
+    """Atomically write credentials to the token file under an exclusive lock."""
+    tmp_file = f"{token_file}.tmp"
+    with open(f"{token_file}.lock", 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(tmp_file, 'w') as f:
+                f.write(creds.to_json())
+            os.replace(tmp_file, token_file)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    _TOKEN_CACHE[token_file] = creds
+
+
 def diagnose_api():
     """Diagnose Google Photos API issues."""
     
@@ -45,20 +95,15 @@ def diagnose_api():
     print("🔐 Testing authentication...")
     
     try:
-        flow = InstalledAppFlow.from_client_secrets_file(
-            'google_photos_credentials.json', 
-            SCOPES,
-            redirect_uri='http://localhost:8080'
-        )
-        
         # Check if we have existing token
         try:
-            creds = Credentials.from_authorized_user_file('google_photos_token.json', SCOPES)
-            if creds and creds.valid:
-                print("✅ Using existing valid credentials")
-            elif creds and creds.expired and creds.refresh_token:
+            creds = load_cached_credentials()
+            if needs_refresh(creds):
                 print("🔄 Refreshing credentials...")
                 creds.refresh(Request())
+                save_credentials(creds)
+            if creds.valid:
+                print("✅ Using existing valid credentials")
             else:
                 print("❌ Invalid credentials")
                 creds = None
@@ -66,9 +111,15 @@ def diagnose_api():
             print("❌ No valid token found")
             creds = None
         
-        if not creds or not creds.valid:
+        if not creds:
             print("🔐 Starting fresh authentication...")
+            flow = InstalledAppFlow.from_client_secrets_file(
+                'google_photos_credentials.json', 
+                SCOPES,
+                redirect_uri='http://localhost:8080'
+            )
             creds = flow.run_local_server(port=8080)
+            save_credentials(creds)
         
         print("✅ Authentication successful")
         print()
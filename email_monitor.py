@@ -7,12 +7,383 @@ and downloading photo attachments from school emails.
 
 import imaplib
 import email
+import json
 import os
+import shutil
+import functools
+import atexit
 import logging
+import socket
+import string
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from email.header import decode_header
+from email.parser import BytesParser
+from email import policy
+from html.parser import HTMLParser
+from urllib.parse import urlparse, urldefrag
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Upper bound on concurrent image downloads for a single email. Downloads are
+# network-bound, so threads overlap socket waits without contending on the GIL.
+MAX_DOWNLOAD_WORKERS = 16
+
+# Chunk size used when streaming image downloads to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Most bytes of email parts (as sent, i.e. still encoded) requested by one FETCH.
+# imaplib holds a whole response in memory, so emails sharing a part FETCH are
+# split into several commands once their parts add up to more than this
+FETCH_BYTES_LIMIT = 32 * 1024 * 1024
+
+# Seconds to wait in a single IMAP IDLE before re-issuing it. Servers may drop
+# idle connections silently (Gmail after about 10 minutes), so stay below that.
+IDLE_TIMEOUT_SECONDS = 540
+
+# Message number at the start of an untagged FETCH response, e.g. b'12 (UID 345 BODY[1] {3456}'
+_FETCH_ID_RE = re.compile(rb'^(\d+) \(')
+
+# Literal length marker in an IMAP response, e.g. b'{3456}'
+_LITERAL_RE = re.compile(rb'\{(\d+)\}')
+
+# Image extension at the end of a URL path, e.g. '/posts/1be2.large.jpeg'
+_IMG_EXT_RE = re.compile(r'\.(?:jpe?g|png|gif|bmp|tiff)$', re.IGNORECASE)
+
+# Characters not allowed in saved filenames; each is replaced with an underscore
+_UNSAFE_FN_RE = re.compile(r'[^\w\-_.]')
+
+# Translation table doing the same replacement for ASCII characters without the regex engine
+_FILENAME_OK = frozenset(string.ascii_letters + string.digits + '_.-')
+_FILENAME_TRANS = str.maketrans({chr(i): '_' for i in range(128) if chr(i) not in _FILENAME_OK})
+
+# Header parser for subject checks; the default policy decodes RFC 2047 encoded words
+_HEADER_PARSER = BytesParser(policy=policy.default)
+
+# Read buffer for IMAP server responses. imaplib reads through the io default of
+# 8 KB, so a large FETCH response took one recv() per 8 KB; this cuts that eightfold
+IMAP_READ_BUFFER_SIZE = 64 * 1024
+
+
+def _reopen_reader(mail: imaplib.IMAP4):
+    """
+    Replace an IMAP connection's response reader with a fresh one using the larger buffer.
+    
+    Anything left in the old reader's buffer is discarded, so only call this when
+    nothing is pending (right after connecting, or after a read timed out). The
+    old reader is closed; the socket stays open.
+    
+    Args:
+        mail (imaplib.IMAP4): Connected IMAP object
+    """
+    mail.file.close()
+    mail.file = mail.sock.makefile('rb', buffering=IMAP_READ_BUFFER_SIZE)
+
+
+class _BufferedReads:
+    """
+    Mixin for imaplib connection classes that reads responses through a larger buffer.
+    
+    imaplib reads lines and literals from ``self.file``, a buffered reader over the
+    socket; it is replaced right after the socket is opened, before the greeting
+    is read, so nothing already buffered is lost.
+    """
+    
+    def open(self, *args, **kwargs):
+        super().open(*args, **kwargs)
+        _reopen_reader(self)
+
+
+class _IMAP4(_BufferedReads, imaplib.IMAP4):
+    """imaplib.IMAP4 with a larger read buffer."""
+
+
+class _IMAP4_SSL(_BufferedReads, imaplib.IMAP4_SSL):
+    """imaplib.IMAP4_SSL with a larger read buffer."""
+
+
+def _parse_imap_value(raw: bytes, pos: int):
+    """
+    Parse one value of an IMAP response (list, string, literal, NIL or atom).
+    
+    Literals are expected to follow their ``{n}`` marker directly, which is how
+    imaplib's ``(header, literal)`` tuples look once concatenated.
+    
+    Args:
+        raw (bytes): Response bytes
+        pos (int): Offset to start parsing from
+        
+    Returns:
+        Tuple[Any, int]: Parsed value (list, bytes or None) and the offset after it
+    """
+    while raw[pos:pos + 1] == b' ':
+        pos += 1
+    
+    char = raw[pos:pos + 1]
+    if char == b'(':
+        values = []
+        pos += 1
+        while True:
+            while raw[pos:pos + 1] == b' ':
+                pos += 1
+            if raw[pos:pos + 1] in (b')', b''):
+                return values, pos + 1
+            value, pos = _parse_imap_value(raw, pos)
+            values.append(value)
+    
+    if char == b'"':
+        value = bytearray()
+        pos += 1
+        while pos < len(raw) and raw[pos:pos + 1] != b'"':
+            if raw[pos:pos + 1] == b'\\':
+                pos += 1
+            value += raw[pos:pos + 1]
+            pos += 1
+        return bytes(value), pos + 1
+    
+    if char == b'{':
+        match = _LITERAL_RE.match(raw, pos)
+        start = match.end()
+        end = start + int(match.group(1))
+        return raw[start:end], end
+    
+    # Atom; section specifiers such as BODY[HEADER.FIELDS (FROM)] may contain spaces
+    start = pos
+    while pos < len(raw) and raw[pos:pos + 1] not in (b' ', b'(', b')'):
+        if raw[pos:pos + 1] == b'[':
+            pos = raw.index(b']', pos)
+        pos += 1
+    atom = raw[start:pos]
+    return (None if atom.upper() == b'NIL' else atom), pos
+
+
+def iter_fetch_response(data: list):
+    """
+    Split a (possibly batched) imaplib FETCH response into per-message items.
+    
+    imaplib returns each message either as a single bytes line or, when the
+    response contains literals, as one ``(header, literal)`` tuple per literal
+    followed by the rest of the line as bytes.
+    
+    Args:
+        data (list): Data returned by ``mail.fetch`` or ``mail.uid('FETCH', ...)``
+        
+    Yields:
+        Tuple[str, Dict[str, Any]]: Message number and a dict of FETCH items,
+        keyed by upper-cased item name (e.g. ``'UID'``, ``'BODY[1]'``)
+    """
+    chunks = []
+    current = None
+    for item in data:
+        if item is None:
+            continue
+        if current is None:
+            current = bytearray()
+            chunks.append(current)
+        if isinstance(item, tuple):
+            current += item[0] + item[1]
+        else:
+            current += item
+            current = None
+    
+    for chunk in chunks:
+        chunk = bytes(chunk)
+        match = _FETCH_ID_RE.match(chunk)
+        if not match:
+            continue
+        values, _ = _parse_imap_value(chunk, match.end() - 1)
+        items = {}
+        for i in range(0, len(values) - 1, 2):
+            items[values[i].decode('ascii', errors='replace').upper()] = values[i + 1]
+        yield match.group(1).decode(), items
+
+
+def _iter_body_parts(structure: list, prefix: str = ''):
+    """
+    Walk a parsed BODYSTRUCTURE and yield every non-multipart part.
+    
+    Args:
+        structure (list): Parsed BODYSTRUCTURE value
+        prefix (str): Part number of ``structure`` itself ('' for the message)
+        
+    Yields:
+        Tuple[str, list]: IMAP part number (e.g. '2' or '1.2') and the part's structure
+    """
+    if structure and isinstance(structure[0], list):
+        # Multipart: child parts come first, followed by the subtype and extension data
+        for index, child in enumerate(structure, 1):
+            if not isinstance(child, list):
+                break
+            yield from _iter_body_parts(child, f"{prefix}.{index}" if prefix else str(index))
+    else:
+        yield prefix or '1', structure
+
+
+def _describe_body_part(structure: list):
+    """
+    Extract the fields needed to decide whether to fetch a BODYSTRUCTURE part.
+    
+    Args:
+        structure (list): Parsed structure of a single (non-multipart) part
+        
+    Returns:
+        Tuple[str, Optional[str], str]: MIME type, disposition type and filename
+    """
+    def text(value) -> str:
+        return value.decode('utf-8', errors='replace') if isinstance(value, bytes) else ''
+    
+    def params(value) -> Dict[str, str]:
+        if not isinstance(value, list):
+            return {}
+        return {text(value[i]).lower(): text(value[i + 1]) for i in range(0, len(value) - 1, 2)}
+    
+    mime_type = f"{text(structure[0])}/{text(structure[1])}".lower()
+    
+    # The disposition follows the type-specific fields and the MD5 extension field
+    if mime_type == 'message/rfc822':
+        disposition_index = 11
+    elif mime_type.startswith('text/'):
+        disposition_index = 9
+    else:
+        disposition_index = 8
+    
+    disposition = None
+    filename = params(structure[2]).get('name', '')
+    if len(structure) > disposition_index and isinstance(structure[disposition_index], list):
+        disposition_value = structure[disposition_index]
+        disposition = text(disposition_value[0]).lower()
+        if len(disposition_value) > 1:
+            filename = params(disposition_value[1]).get('filename', filename)
+    
+    return mime_type, disposition, filename
+
+
+def _part_size(structure: list) -> int:
+    """
+    Read the size of a single part, as sent by the server, from its BODYSTRUCTURE.
+    
+    Args:
+        structure (list): Parsed structure of a single (non-multipart) part
+        
+    Returns:
+        int: Size in bytes of the encoded part body (0 if the server did not say)
+    """
+    try:
+        return int(structure[6])
+    except (IndexError, TypeError, ValueError):
+        return 0
+
+
+def compile_subject_re(keywords: List[str]) -> "re.Pattern":
+    """
+    Compile the subject keywords into a single pattern matching any of them.
+    
+    Args:
+        keywords (List[str]): Exact subject patterns to look for
+        
+    Returns:
+        re.Pattern: Pattern that finds any of the keywords in one pass over a subject
+    """
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+def _subject_search_criterion(keywords: List[str]) -> str:
+    """
+    Build an IMAP SEARCH criterion matching emails whose subject contains any keyword.
+    
+    IMAP's OR takes exactly two search keys, so more keywords are nested,
+    e.g. ``OR SUBJECT "a" OR SUBJECT "b" SUBJECT "c"``.
+    
+    Args:
+        keywords (List[str]): Subject patterns to look for (at least one)
+        
+    Returns:
+        str: The search criterion
+    """
+    subjects = [
+        'SUBJECT "{}"'.format(keyword.replace('\\', '\\\\').replace('"', '\\"'))
+        for keyword in keywords
+    ]
+    criterion = subjects[-1]
+    for subject in reversed(subjects[:-1]):
+        criterion = f'OR {subject} {criterion}'
+    return criterion
+
+
+def _safe_filename(filename: str) -> str:
+    """
+    Replace characters that are unsafe in filenames with underscores.
+    
+    ASCII names go through str.translate only; the regex is kept for names with
+    non-ASCII characters, where Unicode letters and digits are allowed.
+    
+    Args:
+        filename (str): Original filename
+        
+    Returns:
+        str: Sanitized filename
+    """
+    safe_filename = filename.translate(_FILENAME_TRANS)
+    if not safe_filename.isascii():
+        safe_filename = _UNSAFE_FN_RE.sub('_', safe_filename)
+    return safe_filename
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_header_cached(header_value: str) -> str:
+    """
+    Decode an email header value that may be encoded.
+    
+    Results are cached, since the same subjects and senders repeat across a batch
+    of school emails.
+    
+    Args:
+        header_value (str): Raw header value
+        
+    Returns:
+        str: Decoded header value
+    """
+    try:
+        decoded_parts = decode_header(header_value)
+        decoded_string = ""
+        
+        for part, encoding in decoded_parts:
+            if isinstance(part, bytes):
+                if encoding:
+                    decoded_string += part.decode(encoding)
+                else:
+                    decoded_string += part.decode('utf-8', errors='ignore')
+            else:
+                decoded_string += part
+        
+        return decoded_string
+    except Exception:
+        return header_value
+
+
+class _ImageSrcParser(HTMLParser):
+    """
+    Collect the src attribute of every <img> tag in an HTML document.
+    
+    Attribute values are entity-decoded by HTMLParser, so URLs come out with
+    '&amp;' already turned into '&'.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.img_urls = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            src = dict(attrs).get('src')
+            if src:
+                self.img_urls.append(src)
 
 
 class EmailMonitor:
@@ -23,12 +394,15 @@ class EmailMonitor:
     the school, and downloads photo attachments to a local directory.
     """
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, cache_file: Optional[str] = None):
         """
         Initialize the email monitor with configuration settings.
         
         Args:
             config (Dict): Configuration dictionary containing email settings
+            cache_file (Optional[str]): Where to remember the newest handled UID
+                (see remember_emails); defaults to the email.cache_file setting.
+                Scripts give their own file so one does not skip emails for another
         """
         self.config = config
         self.imap_server = config['email']['imap_server']
@@ -38,6 +412,8 @@ class EmailMonitor:
         self.password = config['email']['password']
         self.sender_email = config['email']['sender_email']
         self.subject_keywords = config['email']['subject_keywords']
+        # Any of the keywords, matched in one regex search per subject
+        self._subject_re = compile_subject_re(self.subject_keywords) if self.subject_keywords else None
         # Downloads-related configuration. Use defensive defaults so missing keys in config
         # do not crash the CI/GitHub Actions run. This also makes local runs more resilient
         # if a user copies a minimal config.
@@ -48,10 +424,13 @@ class EmailMonitor:
         # - max_file_size_mb: a conservative 50MB cap to avoid downloading large/unexpected payloads
         downloads_config = config.get('downloads', {})
 
-        # List of file extensions we consider images. Normalize to lowercase when comparing.
-        self.supported_formats = downloads_config.get(
-            'supported_formats',
-            [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"]
+        # File extensions we consider images, lowercased into a set for constant-time
+        # lookups. Extensions are lowercased before comparing against it.
+        self.supported_formats = frozenset(
+            ext.lower() for ext in downloads_config.get(
+                'supported_formats',
+                [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"]
+            )
         )
 
         # Folder used to store temporary downloads during processing.
@@ -82,74 +461,162 @@ class EmailMonitor:
         # Set up logging
         self.logger = logging.getLogger(__name__)
         
+        # Pooled HTTP session for image downloads. Embedded images almost always come
+        # from the same CDN host, so keep-alive lets TCP+TLS setup amortize across images.
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self._http.mount('https://', adapter)
+        self._http.mount('http://', adapter)
+        
         # Create temp folder if it doesn't exist
         os.makedirs(self.temp_folder, exist_ok=True)
+        
+        # Logged-in IMAP connection kept alive across calls (see connect_to_email)
+        self._mail = None
+        
+        # Header and BODYSTRUCTURE of emails whose parts have not been fetched yet,
+        # keyed by UID, so retrying a failed download skips the structure FETCH
+        self._structure_cache = {}
+        
+        # Where the newest handled UID is remembered for incremental searches
+        # (see search_school_emails with only_new=True)
+        self.email_cache_file = cache_file or config['email'].get('cache_file', '.email_cache.json')
+        self._uidvalidity = None
     
     def connect_to_email(self) -> Optional[imaplib.IMAP4_SSL]:
         """
         Establish connection to the email server.
         
+        The logged-in connection is cached and reused by later calls, so repeated
+        runs in the same process (e.g. under the scheduler) skip the TLS handshake
+        and LOGIN. A NOOP is used to check that a cached connection is still alive;
+        if it is not, it is discarded and a fresh connection is opened.
+        
         Returns:
             Optional[imaplib.IMAP4_SSL]: IMAP connection object or None if failed
         """
+        if self._mail is not None:
+            try:
+                status, _ = self._mail.noop()
+                if status == 'OK':
+                    self.logger.info("Reusing existing email server connection")
+                    return self._mail
+            except (imaplib.IMAP4.error, OSError) as e:
+                self.logger.info(f"Cached email connection is no longer usable: {str(e)}")
+            self._forget_mail()
+        
         try:
             self.logger.info(f"Connecting to email server: {self.imap_server}:{self.imap_port}")
             
             if self.use_ssl:
                 # Use SSL connection for secure email access
-                mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+                mail = _IMAP4_SSL(self.imap_server, self.imap_port)
             else:
                 # Use non-SSL connection (not recommended for production)
-                mail = imaplib.IMAP4(self.imap_server, self.imap_port)
+                mail = _IMAP4(self.imap_server, self.imap_port)
             
             # Login with credentials
             mail.login(self.username, self.password)
             self.logger.info("Successfully connected to email server")
+            self._mail = mail
+            # Log out at exit if the connection is still open then; the handler is
+            # removed again when the connection is closed or dropped
+            atexit.register(self._close_mail)
             return mail
             
         except Exception as e:
             self.logger.error(f"Failed to connect to email server: {str(e)}")
             return None
     
-    def search_school_emails(self, mail: imaplib.IMAP4_SSL, days_back: int = 7) -> List[str]:
+    def _close_mail(self):
+        """
+        Log out of the cached email connection, if there is one.
+        
+        Registered with atexit while a connection is open, so it is closed when
+        the process exits.
+        """
+        if self._mail is None:
+            return
+        
+        try:
+            self._mail.logout()
+            self.logger.info("Email connection closed")
+        except Exception as e:
+            self.logger.warning(f"Error closing email connection: {str(e)}")
+        finally:
+            self._forget_mail()
+    
+    def _forget_mail(self):
+        """
+        Drop the cached email connection without logging out, e.g. once it is broken.
+        """
+        self._mail = None
+        atexit.unregister(self._close_mail)
+    
+    def search_school_emails(self, mail: imaplib.IMAP4_SSL, days_back: int = 7,
+                             only_new: bool = False) -> List[str]:
         """
         Search for emails from the school within the specified time range.
         
         This method specifically looks for Westshore Montessori School emails
         with the exact subject line pattern "[Westshore Montessori School ]".
         
+        With only_new, only emails newer than the last UID recorded by
+        remember_emails are searched for (UID last+1:*), so a run only looks at
+        mail that arrived since the previous one. The cache is ignored when the
+        folder's UIDVALIDITY has changed, since the old UIDs no longer apply.
+        
         Args:
             mail (imaplib.IMAP4_SSL): Connected IMAP object
             days_back (int): Number of days to look back for emails
+            only_new (bool): Skip emails up to the last remembered UID
             
         Returns:
-            List[str]: List of email IDs that match the criteria
+            List[str]: List of email UIDs that match the criteria
         """
         try:
             # Select the inbox folder
             mail.select('INBOX')
+            _, uidvalidity = mail.response('UIDVALIDITY')
+            self._uidvalidity = int(uidvalidity[-1]) if uidvalidity and uidvalidity[-1] else None
             
-            # Calculate date range for search
-            since_date = (datetime.now() - timedelta(days=days_back)).strftime('%d-%b-%Y')
+            last_uid = None
+            if only_new:
+                cache = self._load_email_cache()
+                if self._uidvalidity is not None and cache.get('uidvalidity') == self._uidvalidity:
+                    last_uid = cache.get('last_uid')
             
-            # Build search criteria for Westshore Montessori School emails
-            # Look for emails from the school sender with the exact subject pattern
-            search_criteria = f'FROM "{self.sender_email}" SINCE {since_date}'
-            
-            # Add subject line filter for the exact pattern
+            # Build search criteria for Westshore Montessori School emails.
+            # The sender and subject pattern are matched by the server, so only
+            # emails we actually want come back and need to be fetched.
+            criteria_parts = [f'FROM "{self.sender_email}"']
+            if last_uid is not None:
+                # Everything after the last handled email; no date range needed
+                criteria_parts.append(f'UID {last_uid + 1}:*')
+            else:
+                # Calculate date range for search
+                since_date = (datetime.now() - timedelta(days=days_back)).strftime('%d-%b-%Y')
+                criteria_parts.append(f'SINCE {since_date}')
             if self.subject_keywords:
-                # For Westshore Montessori, we expect the exact subject pattern
-                subject_pattern = self.subject_keywords[0]  # "[Westshore Montessori School ]"
-                # Use a simpler search approach - search by sender first, then filter in Python
-                search_criteria = f'FROM "{self.sender_email}" SINCE {since_date}'
+                # For Westshore Montessori, we expect the exact subject pattern "[Westshore Montessori School ]";
+                # with more keywords configured, an email matching any of them is found
+                criteria_parts.append(_subject_search_criterion(self.subject_keywords))
+            search_criteria = ' '.join(criteria_parts)
             
             self.logger.info(f"Searching for Westshore Montessori emails with criteria: {search_criteria}")
             
-            # Execute search
-            status, messages = mail.search(None, search_criteria)
+            # Execute search; UIDs stay valid across sessions, unlike message numbers
+            status, messages = mail.uid('SEARCH', None, search_criteria)
             
             if status == 'OK':
-                email_ids = messages[0].split()
+                email_ids = [email_id.decode() for email_id in messages[0].split()]
+                if last_uid is not None:
+                    # "n:*" always includes the newest message, even when its UID is below n
+                    email_ids = [email_id for email_id in email_ids if int(email_id) > last_uid]
                 self.logger.info(f"Found {len(email_ids)} Westshore Montessori emails matching criteria")
                 
                 # Log the expected pattern for verification
@@ -157,7 +624,7 @@ class EmailMonitor:
                     self.logger.info(f"Expected: 2 emails on Fridays around 6:46 PM")
                     self.logger.info(f"Found: {len(email_ids)} emails")
                 
-                return [email_id.decode() for email_id in email_ids]
+                return email_ids
             else:
                 self.logger.warning("Email search failed")
                 return []
@@ -166,42 +633,111 @@ class EmailMonitor:
             self.logger.error(f"Error searching for emails: {str(e)}")
             return []
     
-    def download_attachments(self, mail: imaplib.IMAP4_SSL, email_ids: List[str]) -> List[str]:
+    def get_uidvalidity(self) -> Optional[int]:
+        """
+        Return the INBOX's UIDVALIDITY as seen by the last search_school_emails call.
+        
+        UIDs are only comparable between sessions while this value stays the same.
+        
+        Returns:
+            Optional[int]: The UIDVALIDITY, or None before the first search
+        """
+        return self._uidvalidity
+    
+    def _load_email_cache(self) -> Dict:
+        """
+        Load the UIDVALIDITY and last handled UID saved by earlier runs.
+        
+        Returns:
+            Dict: The cached values (empty if there is no cache)
+        """
+        try:
+            with open(self.email_cache_file, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+    
+    def remember_emails(self, email_ids: List[str]):
+        """
+        Record the given emails as handled, so searches with only_new skip them.
+        
+        Call this only after the emails have been processed successfully, so a
+        failed run picks them up again.
+        
+        Args:
+            email_ids (List[str]): UIDs returned by the last search_school_emails call
+        """
+        if not email_ids or self._uidvalidity is None:
+            return
+        
+        cache = self._load_email_cache()
+        last_uid = max(int(email_id) for email_id in email_ids)
+        if cache.get('uidvalidity') == self._uidvalidity:
+            last_uid = max(last_uid, cache.get('last_uid', 0))
+        
+        try:
+            with open(self.email_cache_file, 'w') as cache_file:
+                json.dump({'uidvalidity': self._uidvalidity, 'last_uid': last_uid}, cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save email cache: {str(e)}")
+    
+    def download_attachments(self, mail: imaplib.IMAP4_SSL, email_ids: List[str],
+                             prefetched: Optional[Dict[str, Tuple[bytes, list]]] = None,
+                             dest_folder: Optional[str] = None,
+                             files_by_email: Optional[Dict[str, List[str]]] = None) -> List[str]:
         """
         Download photo attachments from the specified email IDs.
         
         Args:
             mail (imaplib.IMAP4_SSL): Connected IMAP object
-            email_ids (List[str]): List of email IDs to process
+            email_ids (List[str]): List of email UIDs to process
+            prefetched (Optional[Dict[str, Tuple[bytes, list]]]): Headers and parsed
+                BODYSTRUCTURE already fetched by the caller, keyed by UID; these are
+                not fetched again
+            dest_folder (Optional[str]): Folder to save the photos in; defaults to
+                the configured temp folder
+            files_by_email (Optional[Dict[str, List[str]]]): If given, filled with the
+                files downloaded from each email; emails that could not be fetched or
+                processed are left out
             
         Returns:
             List[str]: List of downloaded file paths
         """
         downloaded_files = []
         
+        if not email_ids:
+            return downloaded_files
+        
+        try:
+            messages = self._fetch_messages(mail, email_ids, prefetched)
+        except Exception as e:
+            self.logger.error(f"Error fetching emails {email_ids}: {str(e)}")
+            return downloaded_files
+        
+        # One timestamp for the whole batch; it only has to keep filenames unique
+        # across runs, and the email ID already separates files within a run
+        batch_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dest_folder = dest_folder or self.temp_folder
+        
         for email_id in email_ids:
             try:
                 self.logger.info(f"Processing email ID: {email_id}")
                 
-                # Fetch the email
-                status, msg_data = mail.fetch(email_id, '(RFC822)')
-                
-                if status != 'OK':
+                email_message = messages.get(email_id)
+                if email_message is None:
                     self.logger.warning(f"Failed to fetch email {email_id}")
                     continue
                 
-                # Parse the email
-                email_body = msg_data[0][1]
-                email_message = email.message_from_bytes(email_body)
-                
                 # Get email subject and sender for logging
                 subject = self._decode_header(email_message['Subject'])
                 sender = self._decode_header(email_message['From'])
                 self.logger.info(f"Processing email from {sender}: {subject}")
                 
                 # Process attachments
-                files_from_email = self._process_email_attachments(email_message, email_id)
+                files_from_email = self._process_email_attachments(email_message, email_id, batch_ts, dest_folder)
                 downloaded_files.extend(files_from_email)
+                if files_by_email is not None:
+                    files_by_email[email_id] = files_from_email
                 
             except Exception as e:
                 self.logger.error(f"Error processing email {email_id}: {str(e)}")
@@ -209,6 +745,168 @@ class EmailMonitor:
         
         return downloaded_files
     
+    def _select_body_parts(self, structure: list) -> List[str]:
+        """
+        Choose which parts of a multipart email need to be fetched.
+        
+        Only image attachments and the first HTML part (which carries the
+        embedded photo links in Westshore Montessori emails) are needed.
+        Attachments too large to pass the max_file_size check are left out
+        based on the size in their structure, before any of their bytes are fetched.
+        
+        Args:
+            structure (list): Parsed BODYSTRUCTURE of the email
+            
+        Returns:
+            List[str]: IMAP part numbers to fetch
+        """
+        part_numbers = []
+        html_found = False
+        
+        for part_number, part in _iter_body_parts(structure):
+            mime_type, disposition, filename = _describe_body_part(part)
+            
+            if mime_type == 'text/html' and not html_found:
+                html_found = True
+                part_numbers.append(part_number)
+            elif disposition == 'attachment' and (
+                mime_type.startswith('image/')
+                or os.path.splitext(filename.lower())[1] in self.supported_formats
+            ):
+                # Base64 grows the data by a third, so anything sent larger than
+                # that cannot fit the limit once decoded and is not fetched at all
+                if _part_size(part) > self.max_file_size * 4 // 3 + 4:
+                    self.logger.warning(f"File too large, skipping: {filename} ({_part_size(part)} bytes encoded)")
+                    continue
+                part_numbers.append(part_number)
+        
+        return part_numbers
+    
+    def _fetch_messages(self, mail: imaplib.IMAP4_SSL, email_ids: List[str],
+                        prefetched: Optional[Dict[str, Tuple[bytes, list]]] = None) -> Dict[str, email.message.Message]:
+        """
+        Fetch only the parts of each email needed to find photos.
+        
+        The BODYSTRUCTURE and top-level header of all emails are fetched with one
+        command, and emails whose subject contains none of the subject keywords
+        are dropped at that point. Then only the selected parts (see _select_body_parts) are fetched
+        with BODY.PEEK, which also leaves the emails unread. Emails that need the
+        same parts share a single FETCH command, so a batch of identically
+        structured school emails costs two round-trips in total, or one when
+        the headers and structure are already known (fetched by the caller, or
+        by an earlier attempt whose part fetch failed). A shared FETCH is split
+        when the part sizes in the structure add up to more than FETCH_BYTES_LIMIT,
+        which bounds the memory a single response takes.
+        
+        Args:
+            mail (imaplib.IMAP4_SSL): Connected IMAP object
+            email_ids (List[str]): List of email UIDs to fetch
+            prefetched (Optional[Dict[str, Tuple[bytes, list]]]): Already fetched
+                headers and BODYSTRUCTURE keyed by UID (see download_attachments)
+            
+        Returns:
+            Dict[str, email.message.Message]: Messages keyed by UID, containing
+            the top-level headers and only the fetched parts
+        """
+        # Only ask the server for the structure of emails not already known
+        known = dict(self._structure_cache)
+        if prefetched:
+            known.update(prefetched)
+        fetched = [(email_id, known[email_id][1], known[email_id][0]) for email_id in email_ids if email_id in known]
+        missing = [email_id for email_id in email_ids if email_id not in known]
+        
+        if missing:
+            status, data = mail.uid('FETCH', ','.join(missing), '(BODYSTRUCTURE BODY.PEEK[HEADER])')
+            if status != 'OK':
+                self.logger.warning(f"Failed to fetch structure of emails {missing}")
+            else:
+                for _, items in iter_fetch_response(data):
+                    uid = items.get('UID')
+                    if uid is not None:
+                        fetched.append((uid.decode(), items.get('BODYSTRUCTURE'), items.get('BODY[HEADER]')))
+        
+        subject_re = self._subject_re
+        headers = {}
+        sections_by_uid = {}
+        fetch_sizes = {}
+        for uid, structure, header in fetched:
+            if not isinstance(structure, list) or header is None:
+                continue
+            
+            # Check the subject from the headers alone before fetching any body parts
+            if subject_re is not None:
+                subject = _HEADER_PARSER.parsebytes(header, headersonly=True)['Subject'] or ''
+                if not subject_re.search(subject):
+                    self.logger.info(f"Skipping email {uid}: subject does not match {self.subject_keywords!r}")
+                    continue
+            
+            headers[uid] = header
+            self._structure_cache[uid] = (header, structure)
+            if structure and isinstance(structure[0], list):
+                sections_by_uid[uid] = tuple(self._select_body_parts(structure))
+                part_sizes = {number: _part_size(part) for number, part in _iter_body_parts(structure)}
+                fetch_sizes[uid] = sum(part_sizes.get(section, 0) for section in sections_by_uid[uid])
+            else:
+                # Single-part email: its text is the only part there is
+                sections_by_uid[uid] = ('TEXT',)
+                fetch_sizes[uid] = _part_size(structure)
+        
+        # Group emails needing the same parts so each group is one FETCH, splitting
+        # a group when its parts would make the response larger than FETCH_BYTES_LIMIT
+        groups = []
+        open_groups = {}
+        for uid, sections in sections_by_uid.items():
+            if not sections:
+                continue
+            group = open_groups.get(sections)
+            if group is None or (group[2] and group[2] + fetch_sizes[uid] > FETCH_BYTES_LIMIT):
+                group = open_groups[sections] = [sections, [], 0]
+                groups.append(group)
+            group[1].append(uid)
+            group[2] += fetch_sizes[uid]
+        
+        bodies = {}
+        for sections, uids, _ in groups:
+            fetch_items = ' '.join(
+                'BODY.PEEK[TEXT]' if section == 'TEXT'
+                else f'BODY.PEEK[{section}.MIME] BODY.PEEK[{section}]'
+                for section in sections
+            )
+            status, data = mail.uid('FETCH', ','.join(uids), f'({fetch_items})')
+            if status != 'OK':
+                self.logger.warning(f"Failed to fetch parts of emails {uids}")
+                continue
+            
+            for _, items in iter_fetch_response(data):
+                if items.get('UID') is not None:
+                    bodies[items['UID'].decode()] = items
+        
+        messages = {}
+        for uid, sections in sections_by_uid.items():
+            if sections and uid not in bodies:
+                continue
+            
+            items = bodies.get(uid, {})
+            if sections == ('TEXT',):
+                messages[uid] = email.message_from_bytes(headers[uid] + (items.get('BODY[TEXT]') or b''))
+                continue
+            
+            # Rebuild the email with just the fetched parts, each from its own MIME header and body
+            message = email.message_from_bytes(headers[uid])
+            parts = []
+            for section in sections:
+                body = items.get(f'BODY[{section}]')
+                if body is not None:
+                    parts.append(email.message_from_bytes((items.get(f'BODY[{section}.MIME]') or b'') + body))
+            message.set_payload(parts)
+            messages[uid] = message
+        
+        # Emails that were fetched completely will not be retried
+        for uid in messages:
+            self._structure_cache.pop(uid, None)
+        
+        return messages
+    
     def _decode_header(self, header_value: str) -> str:
         """
         Decode email header values that may be encoded.
@@ -222,24 +920,10 @@ class EmailMonitor:
         if not header_value:
             return ""
         
-        try:
-            decoded_parts = decode_header(header_value)
-            decoded_string = ""
-            
-            for part, encoding in decoded_parts:
-                if isinstance(part, bytes):
-                    if encoding:
-                        decoded_string += part.decode(encoding)
-                    else:
-                        decoded_string += part.decode('utf-8', errors='ignore')
-                else:
-                    decoded_string += part
-            
-            return decoded_string
-        except Exception:
-            return str(header_value)
+        return _decode_header_cached(str(header_value))
     
-    def _process_email_attachments(self, email_message, email_id: str) -> List[str]:
+    def _process_email_attachments(self, email_message, email_id: str, batch_ts: str,
+                                   dest_folder: str) -> List[str]:
         """
         Process attachments from a single email message.
         
@@ -250,88 +934,151 @@ class EmailMonitor:
         Args:
             email_message: Parsed email message object
             email_id (str): ID of the email being processed
+            batch_ts (str): Timestamp prefix for the saved filenames
+            dest_folder (str): Folder to save the photos in
             
         Returns:
             List[str]: List of downloaded file paths
         """
+        # Single-part emails (plain HTML newsletters) have no tree to walk; the
+        # message itself is the only part that can hold photos
+        if not email_message.is_multipart() and email_message.get_content_disposition() != 'attachment':
+            if email_message.get_content_type() != 'text/html':
+                self.logger.info("No HTML content found in email")
+                return []
+            return self._extract_images_from_html_part(email_message, email_id, batch_ts, dest_folder)
+        
         downloaded_files = []
         
-        # First, try to process traditional attachments
+        # Walk the MIME tree once, collecting attachments and the first HTML part
+        attachment_parts = []
+        html_part = None
         for part in email_message.walk():
             if part.get_content_disposition() == 'attachment':
-                filename = part.get_filename()
-                
-                if not filename:
-                    continue
-                
-                # Decode filename if it's encoded
-                filename = self._decode_header(filename)
-                
-                # Check if file is a supported image format
-                file_extension = os.path.splitext(filename.lower())[1]
-                if file_extension not in self.supported_formats:
-                    self.logger.info(f"Skipping non-image attachment: {filename}")
-                    continue
-                
-                # Check file size
-                payload = part.get_payload(decode=True)
-                if len(payload) > self.max_file_size:
-                    self.logger.warning(f"File too large, skipping: {filename} ({len(payload)} bytes)")
-                    continue
+                attachment_parts.append(part)
+            elif html_part is None and part.get_content_type() == 'text/html':
+                html_part = part
+        
+        # First, try to process traditional attachments
+        for part in attachment_parts:
+            filename = part.get_filename()
+            
+            if not filename:
+                continue
+            
+            # Decode filename if it's encoded
+            filename = self._decode_header(filename)
+            
+            # Check if file is a supported image format
+            file_extension = os.path.splitext(filename.lower())[1]
+            if file_extension not in self.supported_formats:
+                self.logger.info(f"Skipping non-image attachment: {filename}")
+                continue
+            
+            # Check file size
+            payload = part.get_payload(decode=True)
+            if len(payload) > self.max_file_size:
+                self.logger.warning(f"File too large, skipping: {filename} ({len(payload)} bytes)")
+                continue
+            
+            # Create unique filename to avoid conflicts
+            safe_filename = _safe_filename(filename)
+            unique_filename = f"{batch_ts}_{email_id}_{safe_filename}"
+            file_path = os.path.join(dest_folder, unique_filename)
+            
+            try:
+                # Save the attachment
+                with open(file_path, 'wb') as f:
+                    f.write(payload)
                 
-                # Create unique filename to avoid conflicts
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_filename = re.sub(r'[^\w\-_\.]', '_', filename)
-                unique_filename = f"{timestamp}_{email_id}_{safe_filename}"
-                file_path = os.path.join(self.temp_folder, unique_filename)
+                self.logger.info(f"Downloaded attachment: {filename} -> {file_path}")
+                downloaded_files.append(file_path)
                 
-                try:
-                    # Save the attachment
-                    with open(file_path, 'wb') as f:
-                        f.write(payload)
-                    
-                    self.logger.info(f"Downloaded attachment: {filename} -> {file_path}")
-                    downloaded_files.append(file_path)
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to save attachment {filename}: {str(e)}")
-                    continue
+            except Exception as e:
+                self.logger.error(f"Failed to save attachment {filename}: {str(e)}")
+                continue
         
         # If no traditional attachments found, look for embedded images in HTML
         if not downloaded_files:
             self.logger.info("No traditional attachments found, looking for embedded images in HTML content")
-            html_images = self._extract_images_from_html(email_message, email_id)
-            downloaded_files.extend(html_images)
+            if html_part is None:
+                self.logger.info("No HTML content found in email")
+            else:
+                html_images = self._extract_images_from_html_part(html_part, email_id, batch_ts, dest_folder)
+                downloaded_files.extend(html_images)
         
         return downloaded_files
     
-    def _extract_images_from_html(self, email_message, email_id: str) -> List[str]:
+    def _download_image(self, img_url: str, file_path: str) -> Optional[int]:
         """
-        Extract image URLs from HTML content and download them.
+        Stream a single image from a URL straight to disk.
+        
+        The download is aborted as soon as the image is known to exceed the
+        configured maximum file size, either from the Content-Length header
+        or from the running byte count while streaming. Responses with a known,
+        acceptable size are copied from the socket with shutil.copyfileobj.
+        
+        Args:
+            img_url (str): URL of the image to download
+            file_path (str): Destination path for the image
+            
+        Returns:
+            Optional[int]: Number of bytes written, or None if the image was too large
+        """
+        with self._http.get(img_url, timeout=(5, 30), stream=True) as response:
+            response.raise_for_status()
+            
+            # Fast reject using the advertised size before reading the body
+            content_length = response.headers.get('Content-Length')
+            if content_length and content_length.isdigit() and int(content_length) > self.max_file_size:
+                self.logger.warning(f"Image too large, skipping: {content_length} bytes")
+                return None
+            
+            # With a trustworthy size and no content encoding, copy the socket stream
+            # straight to the file; copyfileobj keeps the loop out of Python code
+            encoding = response.headers.get('Content-Encoding', 'identity').lower()
+            if content_length and content_length.isdigit() and encoding == 'identity':
+                with open(file_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                    return f.tell()
+            
+            total = 0
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    total += len(chunk)
+                    if total > self.max_file_size:
+                        break
+                    f.write(chunk)
+            
+            if total > self.max_file_size:
+                os.remove(file_path)
+                self.logger.warning(f"Image too large, skipping: more than {self.max_file_size} bytes")
+                return None
+        
+        return total
+    
+    def _extract_images_from_html_part(self, html_part, email_id: str, batch_ts: str,
+                                       dest_folder: str) -> List[str]:
+        """
+        Extract image URLs from an HTML part and download them.
         
         This method specifically handles Westshore Montessori emails where photos
         are embedded as images in the HTML content rather than as attachments.
         
         Args:
-            email_message: Parsed email message object
+            html_part: The text/html part of the email
             email_id (str): ID of the email being processed
+            batch_ts (str): Timestamp prefix for the saved filenames
+            dest_folder (str): Folder to save the photos in
             
         Returns:
             List[str]: List of downloaded file paths
         """
-        import requests
-        import re
-        from urllib.parse import urlparse
-        
         downloaded_files = []
         
         try:
-            # Get HTML content from the email
-            html_content = None
-            for part in email_message.walk():
-                if part.get_content_type() == 'text/html':
-                    html_content = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    break
+            # Get HTML content from the email part
+            html_content = html_part.get_payload(decode=True).decode('utf-8', errors='ignore')
             
             if not html_content:
                 self.logger.info("No HTML content found in email")
@@ -339,55 +1086,63 @@ class EmailMonitor:
             
             # Extract image URLs from HTML
             # Look for img tags with src attributes
-            img_pattern = r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>'
-            img_urls = re.findall(img_pattern, html_content, re.IGNORECASE)
+            parser = _ImageSrcParser()
+            parser.feed(html_content)
+            parser.close()
+            # Drop fragments and repeated URLs (e.g. the same image linked twice)
+            # so each image is only downloaded once, keeping the original order
+            img_urls = list(dict.fromkeys(urldefrag(img_url)[0] for img_url in parser.img_urls))
             
             self.logger.info(f"Found {len(img_urls)} image URLs in HTML content")
+            if len(img_urls) < len(parser.img_urls):
+                self.logger.info(f"Skipped {len(parser.img_urls) - len(img_urls)} duplicate image URLs")
             
-            # Download each image
+            # Keep only URLs that look like images, remembering their position in the email
+            candidates = []
             for i, img_url in enumerate(img_urls):
-                try:
-                    # Clean up the URL (remove HTML entities)
-                    img_url = img_url.replace('&amp;', '&')
-                    
-                    # Skip if it's not a valid image URL
-                    if not any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']):
-                        self.logger.debug(f"Skipping non-image URL: {img_url}")
-                        continue
-                    
-                    self.logger.info(f"Downloading image {i+1}/{len(img_urls)}: {img_url}")
-                    
-                    # Download the image
-                    response = requests.get(img_url, timeout=30)
-                    response.raise_for_status()
-                    
-                    # Check file size
-                    if len(response.content) > self.max_file_size:
-                        self.logger.warning(f"Image too large, skipping: {len(response.content)} bytes")
-                        continue
-                    
+                # Skip if it's not a valid image URL. Only the path is checked, so query
+                # strings (such as pre-signed S3 parameters) cannot cause false matches.
+                parsed_url = urlparse(img_url)
+                if not _IMG_EXT_RE.search(parsed_url.path):
+                    self.logger.debug(f"Skipping non-image URL: {img_url}")
+                    continue
+                
+                candidates.append((i, img_url, parsed_url))
+            
+            if not candidates:
+                return downloaded_files
+            
+            # Download the images concurrently, streaming each one to its own file
+            with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(candidates))) as executor:
+                futures = {}
+                for i, img_url, parsed_url in candidates:
                     # Create filename from URL
-                    parsed_url = urlparse(img_url)
                     filename = os.path.basename(parsed_url.path)
                     if not filename or '.' not in filename:
                         filename = f"image_{i+1}.jpg"
                     
                     # Create unique filename
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    safe_filename = re.sub(r'[^\w\-_\.]', '_', filename)
-                    unique_filename = f"{timestamp}_{email_id}_{i+1}_{safe_filename}"
-                    file_path = os.path.join(self.temp_folder, unique_filename)
-                    
-                    # Save the image
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    self.logger.info(f"Downloaded image: {filename} -> {file_path}")
-                    downloaded_files.append(file_path)
+                    safe_filename = _safe_filename(filename)
+                    unique_filename = f"{batch_ts}_{email_id}_{i+1}_{safe_filename}"
+                    file_path = os.path.join(dest_folder, unique_filename)
                     
-                except Exception as e:
-                    self.logger.error(f"Failed to download image {img_url}: {str(e)}")
-                    continue
+                    self.logger.info(f"Downloading image {i+1}/{len(img_urls)}: {img_url}")
+                    futures[executor.submit(self._download_image, img_url, file_path)] = (img_url, filename, file_path)
+                
+                for future in as_completed(futures):
+                    img_url, filename, file_path = futures[future]
+                    try:
+                        if future.result() is None:
+                            continue
+                        
+                        self.logger.info(f"Downloaded image: {filename} -> {file_path}")
+                        downloaded_files.append(file_path)
+                        
+                    except Exception as e:
+                        self.logger.error(f"Failed to download image {img_url}: {str(e)}")
+                        if os.path.exists(file_path):
+                            os.remove(file_path)
+                        continue
             
         except Exception as e:
             self.logger.error(f"Error extracting images from HTML: {str(e)}")
@@ -411,6 +1166,7 @@ class EmailMonitor:
         if not mail:
             return []
         
+        # The connection is left open for reuse by the next call; it is closed at exit
         try:
             # Search for school emails
             email_ids = self.search_school_emails(mail, days_back)
@@ -425,11 +1181,178 @@ class EmailMonitor:
             self.logger.info(f"Successfully downloaded {len(downloaded_files)} photo files")
             return downloaded_files
             
+        except imaplib.IMAP4.abort:
+            # The connection is broken; make sure it is not reused
+            self._forget_mail()
+            raise
+    
+    def _idle(self, mail: imaplib.IMAP4_SSL, timeout: int = IDLE_TIMEOUT_SECONDS) -> bool:
+        """
+        Wait with IMAP IDLE until new mail arrives or the timeout passes.
+        
+        imaplib has no IDLE support, so the command is driven by hand: send IDLE,
+        wait for the continuation, read untagged responses until an EXISTS shows
+        up or the socket times out, then end the command with DONE.
+        
+        Args:
+            mail (imaplib.IMAP4_SSL): Connected IMAP object with a mailbox selected
+            timeout (int): Seconds to wait before giving up on this IDLE
+            
+        Returns:
+            bool: True if the server reported new mail, False on timeout
+        """
+        tag = mail._new_tag()
+        mail.send(tag + b' IDLE\r\n')
+        response = mail.readline()
+        if not response.startswith(b'+'):
+            raise imaplib.IMAP4.error(f"IDLE rejected by server: {response!r}")
+        
+        new_mail = False
+        mail.sock.settimeout(timeout)
+        try:
+            while True:
+                response = mail.readline()
+                if not response:
+                    raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                if response.rstrip().endswith(b'EXISTS'):
+                    new_mail = True
+                    break
+        except socket.timeout:
+            # A file object that timed out refuses further reads, so open a new one
+            _reopen_reader(mail)
         finally:
-            # Always close the email connection
+            mail.sock.settimeout(None)
+        
+        # End the IDLE and consume everything up to its tagged completion
+        mail.send(b'DONE\r\n')
+        while True:
+            response = mail.readline()
+            if not response:
+                raise imaplib.IMAP4.abort("Connection closed while ending IDLE")
+            if response.startswith(tag):
+                break
+        mail.tagged_commands.pop(tag, None)
+        
+        return new_mail
+    
+    def highest_uid(self, mail: imaplib.IMAP4_SSL) -> Optional[int]:
+        """
+        Find the highest UID in the INBOX, below which every existing email lies.
+        
+        Uses UIDNEXT from the SELECT response; servers that do not send it are
+        asked with UID SEARCH UID *.
+        
+        Args:
+            mail (imaplib.IMAP4_SSL): Connected IMAP object
+            
+        Returns:
+            Optional[int]: The highest UID (0 for an empty inbox), or None if the
+            server could not tell
+        """
+        status, _ = mail.select('INBOX')
+        if status != 'OK':
+            return None
+        
+        _, uidnext = mail.response('UIDNEXT')
+        if uidnext and uidnext[-1]:
+            return int(uidnext[-1]) - 1
+        
+        status, data = mail.uid('SEARCH', None, 'UID *')
+        if status != 'OK':
+            return None
+        return max((int(uid) for uid in data[0].split()), default=0)
+    
+    def idle_loop(self, on_new_photos=None, days_back: int = 1, start_uid: Optional[int] = None):
+        """
+        Watch the inbox with IMAP IDLE and download photos as new school emails arrive.
+        
+        Instead of polling, the server pushes a notification when mail arrives, so
+        nothing is searched or fetched between emails. IDLE is re-issued every
+        IDLE_TIMEOUT_SECONDS to keep the connection from being dropped. Emails up
+        to start_uid are left to process_school_emails. Runs until interrupted.
+        
+        Emails count as handled once their photos are downloaded and on_new_photos
+        returns True. Until then they are searched for again after every IDLE, so
+        a failed download or upload is retried.
+        
+        Args:
+            on_new_photos: Optional callable given the list of downloaded file paths
+                and the files downloaded from each email, keyed by UID; it returns
+                True if the photos were handled
+            days_back (int): Number of days to look back when searching after new mail
+            start_uid (Optional[int]): Highest UID already handled by the caller, e.g.
+                read with highest_uid before an initial run; emails above it are
+                looked for straight away. Defaults to the highest UID when the loop starts
+        """
+        last_uid = start_uid
+        # Search without waiting for IDLE first, for emails that arrived before the loop started
+        search_now = start_uid is not None
+        # Emails whose photos could not be handled are looked for again after the next IDLE
+        retry_pending = False
+        
+        while True:
+            mail = self.connect_to_email()
+            if not mail:
+                self.logger.warning("Retrying email connection in 60 seconds")
+                time.sleep(60)
+                continue
+            
             try:
-                mail.close()
-                mail.logout()
-                self.logger.info("Email connection closed")
-            except Exception as e:
-                self.logger.warning(f"Error closing email connection: {str(e)}")
+                if 'IDLE' not in mail.capabilities:
+                    self.logger.error("Email server does not support IDLE")
+                    return
+                
+                if last_uid is None:
+                    # Only emails arriving from now on are handled here
+                    last_uid = self.highest_uid(mail)
+                    if last_uid is None:
+                        self.logger.warning("Could not read the newest email UID; retrying in 60 seconds")
+                        time.sleep(60)
+                        continue
+                    self.logger.info("Waiting for new school emails (IMAP IDLE)")
+                else:
+                    mail.select('INBOX')
+                
+                if search_now:
+                    search_now = False
+                    self.logger.info("Checking for school emails that arrived since the initial run")
+                elif self._idle(mail):
+                    self.logger.info("New mail arrived, checking for school emails")
+                elif retry_pending:
+                    self.logger.info("Retrying school emails whose photos were not handled")
+                else:
+                    continue
+                
+                email_ids = [
+                    email_id for email_id in self.search_school_emails(mail, days_back)
+                    if int(email_id) > last_uid
+                ]
+                if not email_ids:
+                    retry_pending = False
+                    continue
+                
+                files_by_email = {}
+                downloaded_files = self.download_attachments(mail, email_ids, files_by_email=files_by_email)
+                self.logger.info(f"Successfully downloaded {len(downloaded_files)} photo files")
+                
+                # Emails missing from files_by_email could not be fetched
+                handled = len(files_by_email) == len(email_ids)
+                if downloaded_files and on_new_photos:
+                    handled = bool(on_new_photos(downloaded_files, files_by_email)) and handled
+                
+                if handled:
+                    last_uid = max(int(email_id) for email_id in email_ids)
+                    retry_pending = False
+                else:
+                    self.logger.warning(f"Photos of emails {email_ids} were not all handled; retrying after the next IDLE")
+                    retry_pending = True
+                    
+            except (imaplib.IMAP4.abort, OSError) as e:
+                # The connection is broken; drop it so the next pass reconnects
+                self.logger.warning(f"Email connection lost while idling: {str(e)}")
+                self._forget_mail()
+            except imaplib.IMAP4.error as e:
+                # The server refused a command; start again on a fresh connection
+                self.logger.warning(f"Email server error while idling, reconnecting in 60 seconds: {str(e)}")
+                self._close_mail()
+                time.sleep(60)
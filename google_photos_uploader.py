@@ -7,14 +7,172 @@ photos to a specified album in Google Photos.
 
 import os
 import json
+import hashlib
 import logging
-from typing import List, Optional, Dict
-from google.auth.transport.requests import Request
+import mimetypes
+import sqlite3
+from typing import List, Optional, Dict, Iterator, Tuple
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, build_http
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Read size used when hashing photos for the upload ledger
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The Photos Library discovery document is not bundled with google-api-python-client,
+# so it is downloaded once and kept here instead of being fetched on every start
+DISCOVERY_URL = 'https://photoslibrary.googleapis.com/$discovery/rest?version=v1'
+DISCOVERY_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'google_photos_discovery.json')
+
+
+def build_photos_service(**auth):
+    """
+    Build the Google Photos Library API client from the cached discovery document.
+    
+    On a cache miss the document is downloaded and saved for later runs; if that
+    fails, build() fetches it the usual way.
+    
+    Args:
+        **auth: ``http`` or ``credentials``, passed on to the client
+        
+    Returns:
+        The Google Photos service object
+    """
+    try:
+        with open(DISCOVERY_CACHE_FILE, 'r') as cache_file:
+            return build_from_document(cache_file.read(), **auth)
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    try:
+        response = requests.get(DISCOVERY_URL, timeout=30)
+        response.raise_for_status()
+        service = build_from_document(response.text, **auth)
+    except (requests.RequestException, ValueError, KeyError):
+        return build('photoslibrary', 'v1', static_discovery=False, **auth)
+    
+    try:
+        os.makedirs(os.path.dirname(DISCOVERY_CACHE_FILE), exist_ok=True)
+        with open(DISCOVERY_CACHE_FILE, 'w') as cache_file:
+            cache_file.write(response.text)
+    except OSError:
+        pass
+    return service
+
+
+def _file_digest(file_path: str) -> bytes:
+    """
+    Compute a 128-bit BLAKE2b digest of a file's content.
+    
+    The file is read into one reusable buffer, so hashing does not allocate a
+    new bytes object per chunk. hashlib.file_digest (Python 3.11+) does the
+    same thing internally and is used when available.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        bytes: Digest of the file content
+    """
+    with open(file_path, 'rb', buffering=0) as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).digest()
+        
+        digest = hashlib.blake2b(digest_size=16)
+        buffer = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+        return digest.digest()
+
+
+class _FileSlice:
+    """
+    Read-only view of the next ``length`` bytes of an open file.
+    
+    Passed to requests as a request body, so a resumable upload chunk is streamed
+    from disk instead of being read into memory first; ``__len__`` lets requests
+    send a Content-Length rather than a chunked body.
+    """
+    
+    def __init__(self, file, length: int):
+        self._file = file
+        self._length = length
+        self._remaining = length
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+class Pacer:
+    """
+    Adaptive pacing for requests to the Google Photos API.
+    
+    Requests start out almost unthrottled. Every rate-limit response (HTTP 429 /
+    RESOURCE_EXHAUSTED) doubles the delay between requests, and every successful
+    response halves it again, down to a small floor. Safe to share between threads.
+    """
+    
+    def __init__(self, min_delay: float = 0.01, max_delay: float = 30.0):
+        """
+        Initialize the pacer.
+        
+        Args:
+            min_delay (float): Smallest delay between requests, in seconds
+            max_delay (float): Largest delay between requests, in seconds
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Block until the next request may be sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.delay
+        
+        if wait > 0:
+            time.sleep(wait)
+    
+    def on_response(self, status_code: int):
+        """
+        Adjust the delay based on the status of a response.
+        
+        Args:
+            status_code (int): HTTP status code of the response
+        """
+        with self._lock:
+            if status_code == 429:
+                self.delay = min(max(self.delay * 2.0, 1.0), self.max_delay)
+            elif 200 <= status_code < 300:
+                self.delay = max(self.delay / 2.0, self.min_delay)
 
 
 class GooglePhotosUploader:
@@ -31,6 +189,29 @@ class GooglePhotosUploader:
         'https://www.googleapis.com/auth/photoslibrary.appendonly'
     ]
     
+    # Maximum number of items the API accepts in one mediaItems.batchCreate call
+    BATCH_CREATE_LIMIT = 50
+    
+    # Endpoint that accepts photo bytes and returns an upload token
+    UPLOAD_URL = 'https://photoslibrary.googleapis.com/v1/uploads'
+    
+    # Files larger than this use the resumable upload protocol
+    RESUMABLE_THRESHOLD = 10 * 1024 * 1024
+    
+    # Chunk size for resumable uploads; must be a multiple of 256 KiB
+    RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+    
+    # Number of times a failed resumable chunk is resumed before giving up
+    RESUMABLE_MAX_RETRIES = 3
+    
+    # Number of times a rate-limited upload or batchCreate request is retried
+    RATE_LIMIT_RETRIES = 5
+    
+    # Credentials, service and upload session per token file, shared by every
+    # uploader in the process so a new instance does not redo the token-file I/O
+    # and the discovery fetch
+    _auth_cache: Dict[str, Tuple] = {}
+    
     def __init__(self, config: Dict):
         """
         Initialize the Google Photos uploader with configuration settings.
@@ -43,13 +224,107 @@ class GooglePhotosUploader:
         self.token_file = config['google_photos']['token_file']
         self.album_name = config['google_photos']['album_name']
         
+        # Album IDs (title -> ID) are remembered so later runs skip the album search;
+        # by default next to the token file, or wherever album_cache_file points
+        self.album_cache_file = os.path.expanduser(config['google_photos'].get(
+            'album_cache_file',
+            os.path.join(os.path.dirname(self.token_file), 'album_cache.json')
+        ))
+        
         # Set up logging
         self.logger = logging.getLogger(__name__)
         
+        # Number of photos whose bytes are uploaded at the same time
+        self.upload_concurrency = config['google_photos'].get('upload_concurrency', 8)
+        
+        # Request pacing, kept separate for the two stages of an upload: byte uploads
+        # (generous limits, shared by the upload threads) and batchCreate calls (the
+        # stricter write quota), so backing off on one does not slow the other
+        self.upload_pacer = Pacer()
+        self.create_pacer = Pacer()
+        
+        # Connection pool for byte uploads, so each photo reuses a kept-alive
+        # connection to the uploads endpoint instead of a new TCP+TLS handshake.
+        # Only failed connects are retried here: Retry's default allowed methods exclude
+        # POST, so a streamed body is never resent half-read. Rate limits and server
+        # errors are retried by the upload methods themselves.
+        self._http_adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(16, self.upload_concurrency),
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        )
+        
+        # Authorized HTTP session for byte uploads (will be set after authentication)
+        self._http = None
+        
+        # Ledger of uploaded photo content, so photos seen again by later runs are skipped
+        self.ledger_file = os.path.join(os.path.dirname(self.token_file), 'uploaded.db')
+        try:
+            self._ledger = sqlite3.connect(self.ledger_file)
+            self._ledger.execute('CREATE TABLE IF NOT EXISTS uploaded (hash BLOB PRIMARY KEY, media_item_id TEXT, ts INTEGER)')
+        except sqlite3.Error as e:
+            self.logger.warning(f"Upload ledger unavailable, duplicates will not be skipped: {str(e)}")
+            self._ledger = None
+        
         # Initialize service (will be set after authentication)
+        self._creds = None
+        # Upload threads that get a 401 at the same time refresh the shared token one at a time
+        self._refresh_lock = threading.Lock()
         self.service = None
         self.album_id = None
     
+    def ensure_authenticated(self) -> bool:
+        """
+        Make sure there is a usable Google Photos service, authenticating only when needed.
+        
+        An existing service is kept across runs; its access token is refreshed in memory
+        once it has expired, and the full authentication is only done the first time or
+        when the refresh fails.
+        
+        Returns:
+            bool: True if the service is ready, False otherwise
+        """
+        if not self.service:
+            cached = self._auth_cache.get(self.token_file)
+            if cached:
+                self._creds, self.service, self._http = cached
+        
+        if self.service and self._creds:
+            if self._creds.valid:
+                return True
+            
+            if self._creds.expired and self._creds.refresh_token:
+                try:
+                    self.logger.info("Refreshing expired Google Photos credentials")
+                    self._creds.refresh(Request())
+                    return True
+                except Exception as e:
+                    self.logger.warning(f"Could not refresh Google Photos credentials: {str(e)}")
+        
+        return self.authenticate()
+    
+    def can_authenticate_silently(self) -> bool:
+        """
+        Check whether ensure_authenticated can finish without the interactive OAuth flow.
+        
+        That is the case when the credentials in use, or else the saved token, are
+        valid or can be refreshed. Nothing is refreshed or built here.
+        
+        Returns:
+            bool: True if no browser login will be needed
+        """
+        creds = self._creds
+        if creds is None and self.token_file in self._auth_cache:
+            creds = self._auth_cache[self.token_file][0]
+        if creds is None and os.path.exists(self.token_file):
+            try:
+                creds = Credentials.from_authorized_user_file(self.token_file, self.SCOPES)
+            except Exception as e:
+                self.logger.warning(f"Could not read Google Photos credentials: {str(e)}")
+                return False
+        
+        return creds is not None and (creds.valid or bool(creds.expired and creds.refresh_token))
+    
     def authenticate(self) -> bool:
         """
         Authenticate with Google Photos API using OAuth2.
@@ -91,8 +366,18 @@ class GooglePhotosUploader:
                     token.write(creds.to_json())
                 self.logger.info("Google Photos credentials saved")
             
-            # Build the Google Photos service
-            self.service = build('photoslibrary', 'v1', credentials=creds, static_discovery=False)
+            # Build the Google Photos service on one authorized connection; given only
+            # credentials, the client would open a new connection per request
+            self.service = build_photos_service(http=AuthorizedHttp(creds, http=build_http()))
+            
+            # Session for byte uploads that adds the access token to each request and
+            # refreshes it when it is about to expire, so long runs keep working. Its own
+            # resend after a 401 is turned off: the photo is sent as a stream, which that
+            # resend would find already read, so the upload methods rewind and resend instead
+            self._http = AuthorizedSession(creds, max_refresh_attempts=0)
+            self._http.mount('https://', self._http_adapter)
+            self._creds = creds
+            self._auth_cache[self.token_file] = (creds, self.service, self._http)
             self.logger.info("Successfully authenticated with Google Photos API")
             return True
             
@@ -100,10 +385,45 @@ class GooglePhotosUploader:
             self.logger.error(f"Google Photos authentication failed: {str(e)}")
             return False
     
+    def _load_album_cache(self) -> Dict[str, str]:
+        """
+        Load the album IDs saved by earlier runs.
+        
+        Returns:
+            Dict[str, str]: Album IDs keyed by album name (empty if there is no cache)
+        """
+        try:
+            with open(self.album_cache_file, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_album_cache(self, album_id: str):
+        """
+        Remember the album ID for the configured album name.
+        
+        Args:
+            album_id (str): ID of the album
+        """
+        try:
+            album_cache = self._load_album_cache()
+            album_cache[self.album_name] = album_id
+            cache_dir = os.path.dirname(self.album_cache_file)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(self.album_cache_file, 'w') as cache_file:
+                json.dump(album_cache, cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save album cache: {str(e)}")
+    
     def find_or_create_album(self) -> Optional[str]:
         """
         Find existing album or create a new one with the specified name.
         
+        The album ID is cached in album_cache_file, so later runs only need a
+        single albums.get call to confirm the album still exists. The full,
+        paginated album listing is only used when the cache misses.
+        
         Returns:
             Optional[str]: Album ID if successful, None otherwise
         """
@@ -112,18 +432,38 @@ class GooglePhotosUploader:
                 self.logger.error("Google Photos service not initialized")
                 return None
             
-            self.logger.info(f"Looking for album: {self.album_name}")
+            # Use the album ID remembered from an earlier run, after checking it still exists
+            cached_album_id = self._load_album_cache().get(self.album_name)
+            if cached_album_id:
+                try:
+                    album = self.service.albums().get(albumId=cached_album_id).execute()
+                    if album.get('title') == self.album_name:
+                        self.album_id = cached_album_id
+                        self.logger.info(f"Using cached album: {self.album_name} (ID: {self.album_id})")
+                        return self.album_id
+                except Exception as e:
+                    self.logger.info(f"Cached album ID is no longer valid: {str(e)}")
             
-            # Search for existing albums
-            albums_response = self.service.albums().list(pageSize=50).execute()
-            albums = albums_response.get('albums', [])
+            self.logger.info(f"Looking for album: {self.album_name}")
             
-            # Look for existing album with the same name
-            for album in albums:
-                if album.get('title') == self.album_name:
-                    self.album_id = album['id']
-                    self.logger.info(f"Found existing album: {self.album_name} (ID: {self.album_id})")
-                    return self.album_id
+            # Search all pages of existing albums for one with the same name
+            page_token = None
+            while True:
+                list_kwargs = {'pageSize': 50}
+                if page_token:
+                    list_kwargs['pageToken'] = page_token
+                albums_response = self.service.albums().list(**list_kwargs).execute()
+                
+                for album in albums_response.get('albums', []):
+                    if album.get('title') == self.album_name:
+                        self.album_id = album['id']
+                        self.logger.info(f"Found existing album: {self.album_name} (ID: {self.album_id})")
+                        self._save_album_cache(self.album_id)
+                        return self.album_id
+                
+                page_token = albums_response.get('nextPageToken')
+                if not page_token:
+                    break
             
             # Create new album if not found
             self.logger.info(f"Creating new album: {self.album_name}")
@@ -136,6 +476,7 @@ class GooglePhotosUploader:
             created_album = self.service.albums().create(body=album_body).execute()
             self.album_id = created_album['id']
             self.logger.info(f"Created new album: {self.album_name} (ID: {self.album_id})")
+            self._save_album_cache(self.album_id)
             
             return self.album_id
             
@@ -143,174 +484,482 @@ class GooglePhotosUploader:
             self.logger.error(f"Error finding/creating album: {str(e)}")
             return None
     
-    def upload_photo(self, file_path: str, description: str = "") -> Optional[str]:
+    def upload_photo(self, file_path: str) -> Optional[str]:
         """
-        Upload a single photo to Google Photos.
+        Upload the bytes of a single photo and return its upload token.
         
-        This method performs the complete two-step process:
-        1. Upload the media file to get an upload token
-        2. Create a media item in the user's library using the token
+        The photo does not appear in Google Photos until the token is turned into
+        a media item with add_photos_to_album, which can take many tokens at once.
         
         Args:
             file_path (str): Path to the photo file to upload
-            description (str): Optional description for the photo
             
         Returns:
-            Optional[str]: Media item ID if successful, None otherwise
+            Optional[str]: Upload token if successful, None otherwise
         """
-        try:
-            if not self.service:
-                self.logger.error("Google Photos service not initialized")
-                return None
+        if not self.service:
+            self.logger.error("Google Photos service not initialized")
+            return None
+        
+        return self._fetch_upload_token(file_path)
+    
+    def _fetch_upload_token(self, file_path: str) -> Optional[str]:
+        """
+        Upload the bytes of a single photo and return its upload token.
+        
+        This is the first step of the Google Photos upload process. It only talks
+        to the uploads endpoint over plain HTTP, so it is safe to run from several
+        threads at once.
+        
+        Args:
+            file_path (str): Path to the photo file to upload
             
-            if not os.path.exists(file_path):
+        Returns:
+            Optional[str]: Upload token if successful, None otherwise
+        """
+        try:
+            # Get file info for logging with a single stat call
+            try:
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
                 self.logger.error(f"Photo file not found: {file_path}")
                 return None
-            
-            # Get file info for logging
-            file_size = os.path.getsize(file_path)
             file_name = os.path.basename(file_path)
             self.logger.info(f"Uploading photo: {file_name} ({file_size} bytes)")
             
-            # Step 1: Upload the photo using the correct Google Photos API method
-            with open(file_path, 'rb') as photo_file:
-                # First, upload the bytes to get an upload token
-                upload_url = 'https://photoslibrary.googleapis.com/v1/uploads'
-                headers = {
-                    'Authorization': f'Bearer {self.service._http.credentials.token}',
-                    'Content-Type': 'application/octet-stream',
-                    'X-Goog-Upload-Protocol': 'raw',
-                    'X-Goog-Upload-File-Name': file_name
-                }
-                
-                import requests
-                upload_response = requests.post(upload_url, data=photo_file.read(), headers=headers)
-                upload_response.raise_for_status()
-                upload_token = upload_response.text
-                
-                if not upload_token:
-                    self.logger.error(f"Failed to get upload token for {file_name}")
-                    return None
-                
-                self.logger.info(f"Got upload token for {file_name}: {upload_token[:50]}...")
+            if file_size > self.RESUMABLE_THRESHOLD:
+                # Large files use the resumable protocol so a failure does not resend everything
+                upload_token = self._upload_resumable(file_path, file_size, file_name)
+            else:
+                upload_token = self._upload_raw(file_path, file_size, file_name)
             
-            # Step 2: Create the media item in the user's library
-            try:
-                # Prepare the media item creation request
-                media_item_request = {
-                    'newMediaItems': [{
-                        'description': description,
-                        'simpleMediaItem': {
-                            'uploadToken': upload_token
-                        }
-                    }]
-                }
-                
-                # Create the media item
-                create_request = self.service.mediaItems().batchCreate(body=media_item_request)
-                create_response = create_request.execute()
-                
-                # Check if the creation was successful
-                if 'newMediaItemResults' in create_response and create_response['newMediaItemResults']:
-                    result = create_response['newMediaItemResults'][0]
-                    if 'mediaItem' in result:
-                        media_item_id = result['mediaItem']['id']
-                        self.logger.info(f"Successfully created media item for {file_name}, ID: {media_item_id}")
-                        return media_item_id
-                    else:
-                        self.logger.error(f"Failed to create media item for {file_name}: {result.get('status', 'Unknown error')}")
-                        return None
-                else:
-                    self.logger.error(f"Failed to create media item for {file_name}: No results in response")
-                    return None
-                    
-            except Exception as e:
-                self.logger.error(f"Error creating media item for {file_name}: {str(e)}")
+            if not upload_token:
+                self.logger.error(f"Failed to get upload token for {file_name}")
                 return None
-                
+            
+            self.logger.info(f"Got upload token for {file_name}: {upload_token[:50]}...")
+            return upload_token
+            
         except Exception as e:
             self.logger.error(f"Error uploading photo {file_path}: {str(e)}")
             return None
     
-    def add_photos_to_album(self, upload_tokens: List[str]) -> bool:
+    def _upload_raw(self, file_path: str, file_size: int, file_name: str) -> str:
         """
-        Add uploaded photos to the specified album.
+        Upload a photo's bytes in a single request.
         
         Args:
-            upload_tokens (List[str]): List of upload tokens from successful uploads
+            file_path (str): Path to the photo file to upload
+            file_size (int): Size of the file in bytes
+            file_name (str): Name sent to Google Photos with the upload
             
         Returns:
-            bool: True if successful, False otherwise
+            str: Upload token returned by the server
         """
-        try:
-            if not self.service or not self.album_id:
-                self.logger.error("Google Photos service or album not initialized")
-                return False
+        with open(file_path, 'rb') as photo_file:
+            # Upload the bytes to get an upload token
+            headers = {
+                'Content-Type': 'application/octet-stream',
+                'Content-Length': str(file_size),
+                'X-Goog-Upload-Protocol': 'raw',
+                'X-Goog-Upload-File-Name': file_name
+            }
+            
+            refreshed = False
+            for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+                # Pass the open file so the body is streamed from disk rather than read
+                # into memory; the explicit length keeps it from being sent chunked
+                photo_file.seek(0)
+                self.upload_pacer.acquire()
+                sent_token = self._creds.token
+                upload_response = self._http.post(self.UPLOAD_URL, data=photo_file, headers=headers)
+                self.upload_pacer.on_response(upload_response.status_code)
+                
+                # A rejected token is refreshed once and the file sent again from the start
+                if upload_response.status_code == 401 and not refreshed and self._refresh_credentials(sent_token):
+                    refreshed = True
+                    continue
+                if upload_response.status_code != 429 or attempt == self.RATE_LIMIT_RETRIES:
+                    break
+                self.logger.warning(f"Rate limited while uploading {file_name}, retrying")
             
-            if not upload_tokens:
-                self.logger.warning("No upload tokens provided")
+            upload_response.raise_for_status()
+            return upload_response.text
+    
+    def _refresh_credentials(self, rejected_token: Optional[str]) -> bool:
+        """
+        Refresh the access token after the server rejected it (HTTP 401).
+        
+        Args:
+            rejected_token (Optional[str]): The token the rejected request was sent with
+        
+        Returns:
+            bool: True if a new token is available
+        """
+        with self._refresh_lock:
+            # Another upload thread may already have replaced the token while this one waited
+            if self._creds.valid and self._creds.token != rejected_token:
                 return True
             
-            self.logger.info(f"Adding {len(upload_tokens)} photos to album")
-            
-            # Prepare batch request
-            new_media_items = []
-            for token in upload_tokens:
-                new_media_items.append({
-                    'simpleMediaItem': {
-                        'uploadToken': token
-                    }
-                })
-            
-            # Create batch create request
-            batch_create_request = {
-                'albumId': self.album_id,
-                'newMediaItems': new_media_items
-            }
+            try:
+                self._creds.refresh(Request())
+                return True
+            except Exception as e:
+                self.logger.warning(f"Could not refresh Google Photos credentials: {str(e)}")
+                return False
+    
+    def _upload_resumable(self, file_path: str, file_size: int, file_name: str) -> Optional[str]:
+        """
+        Upload a photo's bytes with the resumable upload protocol.
+        
+        An upload session is started first, then the file is sent in chunks. If a
+        chunk fails, the server is asked how many bytes it has received and the
+        upload continues from there instead of starting over.
+        
+        Args:
+            file_path (str): Path to the photo file to upload
+            file_size (int): Size of the file in bytes
+            file_name (str): Name sent to Google Photos with the upload
+            
+        Returns:
+            Optional[str]: Upload token if successful, None otherwise
+        """
+        # Step 1: Start the upload session
+        start_headers = {
+            'Content-Length': '0',
+            'X-Goog-Upload-Command': 'start',
+            'X-Goog-Upload-Content-Type': mimetypes.guess_type(file_name)[0] or 'application/octet-stream',
+            'X-Goog-Upload-File-Name': file_name,
+            'X-Goog-Upload-Protocol': 'resumable',
+            'X-Goog-Upload-Raw-Size': str(file_size)
+        }
+        self.upload_pacer.acquire()
+        start_response = self._http.post(self.UPLOAD_URL, headers=start_headers)
+        self.upload_pacer.on_response(start_response.status_code)
+        start_response.raise_for_status()
+        session_url = start_response.headers.get('X-Goog-Upload-URL')
+        if not session_url:
+            self.logger.error(f"No resumable upload URL returned for {file_name}")
+            return None
+        
+        # Step 2: Send the file in chunks, resuming from the server's offset after a failure
+        offset = 0
+        failures = 0
+        refreshed = False
+        with open(file_path, 'rb') as photo_file:
+            while True:
+                photo_file.seek(offset)
+                chunk_size = min(self.RESUMABLE_CHUNK_SIZE, file_size - offset)
+                is_last = offset + chunk_size >= file_size
+                chunk_headers = {
+                    'X-Goog-Upload-Command': 'upload, finalize' if is_last else 'upload',
+                    'X-Goog-Upload-Offset': str(offset)
+                }
+                
+                try:
+                    self.upload_pacer.acquire()
+                    sent_token = self._creds.token
+                    response = self._http.post(session_url, data=_FileSlice(photo_file, chunk_size), headers=chunk_headers)
+                    self.upload_pacer.on_response(response.status_code)
+                    response.raise_for_status()
+                    if is_last:
+                        return response.text
+                    offset += chunk_size
+                    continue
+                except requests.RequestException as e:
+                    status_code = e.response.status_code if e.response is not None else None
+                    if status_code == 401 and not refreshed and self._refresh_credentials(sent_token):
+                        # Sent with a rejected token; resume with the refreshed one
+                        refreshed = True
+                    elif (status_code is not None and status_code < 500 and status_code != 429) or failures >= self.RESUMABLE_MAX_RETRIES:
+                        raise
+                    else:
+                        failures += 1
+                    self.logger.warning(f"Chunk upload failed for {file_name} at offset {offset}, resuming: {str(e)}")
+                
+                # Ask the server how much it already has and continue from there
+                time.sleep(2 ** failures)
+                query_response = self._http.post(session_url, headers={'X-Goog-Upload-Command': 'query'})
+                query_response.raise_for_status()
+                if query_response.headers.get('X-Goog-Upload-Status') == 'final':
+                    self.logger.error(f"Resumable upload session for {file_name} is already closed")
+                    return None
+                offset = int(query_response.headers.get('X-Goog-Upload-Size-Received', offset))
+    
+    def _batch_create_media_items(self, new_media_items: List[Dict], album_id: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Create media items from uploaded bytes, in as few batchCreate calls as possible.
+        
+        The API accepts at most BATCH_CREATE_LIMIT items per call, so the items
+        are sent in slices of that size and the results are combined.
+        
+        Args:
+            new_media_items (List[Dict]): newMediaItems entries, each with an upload token
+            album_id (Optional[str]): Album to add the items to, or None for the main library
             
-            # Execute batch create
-            batch_response = self.service.mediaItems().batchCreate(body=batch_create_request).execute()
+        Returns:
+            List[Optional[str]]: Media item ID for each entry, or None where creation failed
+        """
+        media_item_ids = [None] * len(new_media_items)
+        
+        # The request body is the same for every slice apart from its items
+        request_base = {'albumId': album_id} if album_id else {}
+        
+        for start in range(0, len(new_media_items), self.BATCH_CREATE_LIMIT):
+            chunk = new_media_items[start:start + self.BATCH_CREATE_LIMIT]
+            batch_create_request = dict(request_base, newMediaItems=chunk)
+            
+            # The bytes are already uploaded, so a rate-limited slice is retried once
+            # the pacer has slowed down, rather than losing its upload tokens
+            batch_response = None
+            for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+                try:
+                    self.create_pacer.acquire()
+                    batch_response = self.service.mediaItems().batchCreate(body=batch_create_request).execute()
+                    self.create_pacer.on_response(200)
+                    break
+                except Exception as e:
+                    rate_limited = isinstance(e, HttpError) and (
+                        e.resp.status == 429 or b'RESOURCE_EXHAUSTED' in (e.content or b''))
+                    if rate_limited:
+                        self.create_pacer.on_response(429)
+                        if attempt < self.RATE_LIMIT_RETRIES:
+                            self.logger.warning(f"Rate limited while creating media items {start+1}-{start+len(chunk)}, retrying")
+                            continue
+                    self.logger.error(f"Error creating media items {start+1}-{start+len(chunk)}: {str(e)}")
+                    break
+            
+            if batch_response is None:
+                continue
+            
+            # Check results; a created item is returned with its mediaItem
+            for i, result in enumerate(batch_response.get('newMediaItemResults', [])[:len(chunk)], start):
+                if 'mediaItem' in result:
+                    media_item_ids[i] = result['mediaItem']['id']
+                else:
+                    status = result.get('status', {})
+                    self.logger.warning(f"Failed to create media item for photo {i+1}: {status.get('message', 'Unknown error')}")
+        
+        return media_item_ids
+    
+    def add_photos_to_album(self, upload_tokens: List[str], descriptions: Optional[List[str]] = None) -> bool:
+        """
+        Create media items from upload tokens and add them to the album.
+        
+        If no album is available the items are created in the main library. Each
+        item is created exactly once, with batchCreate calls of up to
+        BATCH_CREATE_LIMIT items.
+        
+        Args:
+            upload_tokens (List[str]): List of upload tokens from successful uploads
+            descriptions (Optional[List[str]]): Description for each token, if any
             
-            # Check results
-            new_media_item_results = batch_response.get('newMediaItemResults', [])
-            successful_uploads = len([result for result in new_media_item_results 
-                                    if result.get('status', {}).get('code') == 'SUCCESS'])
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.service:
+            self.logger.error("Google Photos service not initialized")
+            return False
+        
+        if not upload_tokens:
+            self.logger.warning("No upload tokens provided")
+            return True
+        
+        return any(self.create_media_items(upload_tokens, descriptions))
+    
+    def create_media_items(self, upload_tokens: List[str], descriptions: Optional[List[str]] = None) -> List[Optional[str]]:
+        """
+        Create media items from upload tokens, in the album if there is one.
+        
+        Args:
+            upload_tokens (List[str]): List of upload tokens from successful uploads
+            descriptions (Optional[List[str]]): Description for each token, if any
             
-            self.logger.info(f"Successfully added {successful_uploads}/{len(upload_tokens)} photos to album")
+        Returns:
+            List[Optional[str]]: Media item ID for each token, or None where creation failed
+        """
+        try:
+            destination = "album" if self.album_id else "main library"
+            self.logger.info(f"Adding {len(upload_tokens)} photos to {destination}")
+            
+            # Prepare batch request entries in one pass
+            if descriptions:
+                new_media_items = [
+                    {'description': description, 'simpleMediaItem': {'uploadToken': token}}
+                    for token, description in zip(upload_tokens, descriptions)
+                ]
+            else:
+                new_media_items = [{'simpleMediaItem': {'uploadToken': token}} for token in upload_tokens]
             
-            # Log any failures
-            for i, result in enumerate(new_media_item_results):
-                status = result.get('status', {})
-                if status.get('code') != 'SUCCESS':
-                    self.logger.warning(f"Failed to add photo {i+1} to album: {status.get('message', 'Unknown error')}")
+            media_item_ids = self._batch_create_media_items(new_media_items, self.album_id)
+            successful_uploads = sum(1 for media_item_id in media_item_ids if media_item_id)
+            self.logger.info(f"Successfully added {successful_uploads}/{len(upload_tokens)} photos to {destination}")
             
-            return successful_uploads > 0
+            return media_item_ids
             
         except Exception as e:
             self.logger.error(f"Error adding photos to album: {str(e)}")
+            return [None] * len(upload_tokens)
+    
+    def _filter_uploaded(self, photo_paths: List[str]) -> Tuple[List[str], List[Optional[bytes]], Dict[str, Optional[str]]]:
+        """
+        Drop photos whose content is already in the upload ledger.
+        
+        Photos with identical content in the same list are also only kept once.
+        A photo that cannot be hashed is kept, with no digest.
+        
+        Args:
+            photo_paths (List[str]): List of file paths to upload
+            
+        Returns:
+            Tuple[List[str], List[Optional[bytes]], Dict[str, Optional[str]]]: Remaining
+            paths, their content digests, and for each dropped path the kept path
+            with the same content (None if it is in the ledger)
+        """
+        remaining_paths = []
+        digests = []
+        dropped = {}
+        seen = {}
+        
+        for photo_path in photo_paths:
+            try:
+                digest = _file_digest(photo_path)
+            except OSError as e:
+                self.logger.warning(f"Could not hash {photo_path}: {str(e)}")
+                remaining_paths.append(photo_path)
+                digests.append(None)
+                continue
+            
+            if digest in seen or self._is_uploaded(digest):
+                self.logger.info(f"Skipping already uploaded photo: {os.path.basename(photo_path)}")
+                dropped[photo_path] = seen.get(digest)
+                continue
+            
+            seen[digest] = photo_path
+            remaining_paths.append(photo_path)
+            digests.append(digest)
+        
+        return remaining_paths, digests, dropped
+    
+    def _is_uploaded(self, digest: bytes) -> bool:
+        """
+        Check whether a photo with this content digest was uploaded before.
+        
+        Args:
+            digest (bytes): Content digest of the photo
+            
+        Returns:
+            bool: True if the digest is in the upload ledger
+        """
+        if self._ledger is None:
             return False
+        
+        return self._ledger.execute('SELECT 1 FROM uploaded WHERE hash = ?', (digest,)).fetchone() is not None
+    
+    def _record_uploaded(self, digests: List[Optional[bytes]], media_item_ids: List[Optional[str]]):
+        """
+        Add successfully created photos to the upload ledger.
+        
+        Args:
+            digests (List[Optional[bytes]]): Content digest of each photo
+            media_item_ids (List[Optional[str]]): Media item ID of each photo, or None if it failed
+        """
+        if self._ledger is None:
+            return
+        
+        now = int(time.time())
+        rows = [
+            (digest, media_item_id, now)
+            for digest, media_item_id in zip(digests, media_item_ids)
+            if digest is not None and media_item_id
+        ]
+        try:
+            with self._ledger:
+                self._ledger.executemany('INSERT OR REPLACE INTO uploaded VALUES (?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not update upload ledger: {str(e)}")
+    
+    def _upload_token_stream(self, photo_paths: List[str]) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Upload photo bytes concurrently and yield upload tokens as they arrive.
+        
+        Args:
+            photo_paths (List[str]): List of file paths to upload
+            
+        Yields:
+            Tuple[int, Optional[str]]: Index of the photo in photo_paths and its
+            upload token (None if the upload failed), in completion order
+        """
+        workers = max(1, min(self.upload_concurrency, len(photo_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._fetch_upload_token, photo_path): index
+                for index, photo_path in enumerate(photo_paths)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def _create_uploaded_items(self, uploads: List[Tuple[int, str]], photo_paths: List[str],
+                               digests: List[Optional[bytes]], results: Dict[str, bool]) -> int:
+        """
+        Create media items for a batch of uploaded photos and record them in the ledger.
+        
+        Args:
+            uploads (List[Tuple[int, str]]): Index into photo_paths and upload token of each photo
+            photo_paths (List[str]): List of file paths being uploaded
+            digests (List[Optional[bytes]]): Content digest of each photo in photo_paths
+            results (Dict[str, bool]): Updated with whether each photo's media item was created
+            
+        Returns:
+            int: Number of media items successfully created
+        """
+        upload_tokens = [upload_token for _, upload_token in uploads]
+        # Generate description from filename
+        descriptions = [f"School photo: {os.path.basename(photo_paths[index])}" for index, _ in uploads]
+        
+        media_item_ids = self.create_media_items(upload_tokens, descriptions)
+        self._record_uploaded([digests[index] for index, _ in uploads], media_item_ids)
+        for (index, _), media_item_id in zip(uploads, media_item_ids):
+            results[photo_paths[index]] = bool(media_item_id)
+        
+        return sum(1 for media_item_id in media_item_ids if media_item_id)
     
-    def upload_photos(self, photo_paths: List[str]) -> bool:
+    def upload_photos(self, photo_paths: List[str], results: Optional[Dict[str, bool]] = None) -> bool:
         """
         Upload multiple photos to Google Photos and add them to the album.
         
+        Photo bytes are uploaded concurrently on worker threads, while the main
+        thread turns the resulting upload tokens into media items with batched
+        batchCreate calls, one batch at a time as tokens become available.
+        
         Args:
             photo_paths (List[str]): List of file paths to upload
+            results (Optional[Dict[str, bool]]): If given, filled with whether each
+                path is now in Google Photos (created now, or already uploaded before)
             
         Returns:
             bool: True if at least one photo was successfully uploaded, False otherwise
         """
+        if results is None:
+            results = {}
+        results.update(dict.fromkeys(photo_paths, False))
+        dropped = {}
+        
         try:
             if not photo_paths:
                 self.logger.info("No photos to upload")
                 return True
             
             # Ensure we're authenticated
-            if not self.service:
-                self.logger.info("Authenticating with Google Photos...")
-                if not self.authenticate():
-                    self.logger.error("Failed to authenticate with Google Photos")
-                    return False
+            if not self.ensure_authenticated():
+                self.logger.error("Failed to authenticate with Google Photos")
+                return False
+            
+            # Skip photos that were already uploaded, by earlier runs or earlier in this list
+            photo_paths, digests, dropped = self._filter_uploaded(photo_paths)
+            if not photo_paths:
+                self.logger.info("All photos have already been uploaded")
+                return True
             
             self.logger.info(f"Starting upload of {len(photo_paths)} photos to Google Photos")
             
@@ -321,48 +970,47 @@ class GooglePhotosUploader:
                     self.logger.warning("Could not find or create album, will upload to main library")
                     self.album_id = None
             
-            # Upload each photo and collect upload tokens
-            upload_tokens = []
-            successful_uploads = 0
+            # Upload the photo bytes concurrently and create media items in batches as
+            # soon as enough upload tokens are ready, so the first photos appear in the
+            # album while later ones are still uploading
+            pending = []
+            uploaded_count = 0
+            created_count = 0
             
-            for photo_path in photo_paths:
-                try:
-                    # Generate description from filename
-                    filename = os.path.basename(photo_path)
-                    description = f"School photo: {filename}"
-                    
-                    # Upload the photo
-                    upload_token = self.upload_photo(photo_path, description)
-                    
-                    if upload_token:
-                        upload_tokens.append(upload_token)
-                        successful_uploads += 1
-                    else:
-                        self.logger.warning(f"Failed to upload: {photo_path}")
-                    
-                    # Add small delay to avoid rate limiting
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing photo {photo_path}: {str(e)}")
+            for index, upload_token in self._upload_token_stream(photo_paths):
+                if not upload_token:
+                    self.logger.warning(f"Failed to upload: {photo_paths[index]}")
                     continue
+                
+                uploaded_count += 1
+                pending.append((index, upload_token))
+                if len(pending) == self.BATCH_CREATE_LIMIT:
+                    created_count += self._create_uploaded_items(pending, photo_paths, digests, results)
+                    pending = []
+            
+            if pending:
+                created_count += self._create_uploaded_items(pending, photo_paths, digests, results)
             
-            if not upload_tokens:
+            if not uploaded_count:
                 self.logger.error("No photos were successfully uploaded")
                 return False
             
-            # Add uploaded photos to the album (if we have one)
-            if self.album_id and upload_tokens:
-                album_success = self.add_photos_to_album(upload_tokens)
-                if album_success:
-                    self.logger.info(f"Successfully uploaded {successful_uploads} photos to Google Photos album: {self.album_name}")
-                else:
-                    self.logger.warning("Photos were uploaded but failed to add to album")
+            if not created_count:
+                self.logger.error("Photos were uploaded but no media items could be created")
+                return False
+            
+            if self.album_id:
+                self.logger.info(f"Successfully uploaded photos to Google Photos album: {self.album_name}")
             else:
-                self.logger.info(f"Successfully uploaded {successful_uploads} photos to Google Photos main library")
+                self.logger.info("Successfully uploaded photos to Google Photos main library")
             
-            return successful_uploads > 0
+            return True
             
         except Exception as e:
             self.logger.error(f"Error in upload_photos: {str(e)}")
             return False
+        finally:
+            # A skipped photo is in Google Photos if it was in the ledger, or if the
+            # copy with the same content kept in this list was created
+            for photo_path, kept_path in dropped.items():
+                results[photo_path] = kept_path is None or results.get(kept_path, False)
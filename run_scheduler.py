@@ -14,6 +14,7 @@ import sys
 import time
 import logging
 import argparse
+from logging.handlers import RotatingFileHandler
 import schedule
 from datetime import datetime
 from school_photo_downloader import SchoolPhotoDownloader
@@ -53,20 +54,31 @@ class PhotoDownloaderScheduler:
         Returns:
             logging.Logger: Configured logger instance
         """
+        logger = logging.getLogger(__name__)
+        
+        # Handlers are only added once, so creating another scheduler in the same
+        # process does not write every log line twice
+        if logger.handlers:
+            return logger
+        
         # Create logs directory
         os.makedirs("logs", exist_ok=True)
         
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler("logs/scheduler.log"),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        
-        return logging.getLogger(__name__)
+        # Configure logging; the file is rotated so it cannot grow without bound
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        for handler in (
+            RotatingFileHandler("logs/scheduler.log", maxBytes=10 * 1024 * 1024, backupCount=5),
+            logging.StreamHandler(sys.stdout)
+        ):
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        
+        # The downloader configures the root logger from its own config file;
+        # don't pass scheduler messages up to it as well
+        logger.propagate = False
+        
+        return logger
     
     def _run_downloader(self):
         """
@@ -134,7 +146,12 @@ class PhotoDownloaderScheduler:
         try:
             while True:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                
+                # Sleep until the next run is due instead of waking up every minute
+                idle_seconds = schedule.idle_seconds()
+                if idle_seconds is None:
+                    break
+                time.sleep(max(1, idle_seconds))
                 
         except KeyboardInterrupt:
             self.logger.info("Scheduler stopped by user")
@@ -20,14 +20,60 @@ import os
 import sys
 import logging
 import argparse
+import imaplib
+import json
+import uuid
 import yaml
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List
+from email.header import decode_header
+from email.parser import BytesHeaderParser
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import shutil
 
-# Import our custom modules
-from email_monitor import EmailMonitor
-from google_photos_uploader import GooglePhotosUploader
+# Import our custom modules; google_photos_uploader is imported when the downloader
+# is created, so --help and argument errors do not load the Google client libraries
+from config_loader import load_config
+from email_monitor import EmailMonitor, compile_subject_re, iter_fetch_response
+
+# Number of emails whose headers are requested in one IMAP FETCH command
+HEADER_FETCH_BATCH_SIZE = 100
+
+# The headers the email filtering looks at, plus the MIME headers needed to
+# rebuild the emails that pass when their photos are downloaded
+HEADER_FIELDS = ('SUBJECT', 'FROM', 'DATE', 'MIME-VERSION', 'CONTENT-TYPE', 'CONTENT-TRANSFER-ENCODING')
+
+# Parser for the fetched header blocks; it stops after the headers instead of looking for a body
+_HEADER_PARSER = BytesHeaderParser()
+
+# From this many emails on, header parsing is spread over worker processes;
+# below it, starting the processes costs more than it saves
+PARALLEL_PARSE_THRESHOLD = 500
+
+# Exact subject pattern of the school's photo emails, used when no subject_keywords are configured
+_SCHOOL_SUBJECT = "[Westshore Montessori School ]"
+
+
+def _parse_header_chunk(header_blocks: List[bytes]) -> List[Tuple[str, str, str]]:
+    """
+    Parse fetched header blocks into the values the email filtering needs.
+    
+    Defined at module level so worker processes can run it.
+    
+    Args:
+        header_blocks (List[bytes]): Raw header blocks
+        
+    Returns:
+        List[Tuple[str, str, str]]: Raw From, Subject and Date of each block
+    """
+    results = []
+    for block in header_blocks:
+        message = _HEADER_PARSER.parsebytes(block)
+        results.append((message.get('From', ''), message.get('Subject', ''), message.get('Date', '')))
+    return results
 
 
 class SchoolPhotoDownloader:
@@ -38,27 +84,43 @@ class SchoolPhotoDownloader:
     It handles configuration loading, logging setup, and the overall workflow.
     """
     
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", config: Optional[Dict] = None):
         """
         Initialize the school photo downloader.
         
         Args:
             config_path (str): Path to the configuration file
+            config (Optional[Dict]): Configuration already loaded by the caller;
+                config_path is not read again when given
         """
         self.config_path = config_path
-        self.config = self._load_config()
+        self.config = self._load_config(config)
+        self._ensure_layout()
         self._setup_logging()
         
         # Initialize components
+        from google_photos_uploader import GooglePhotosUploader
         self.email_monitor = EmailMonitor(self.config)
         self.google_uploader = GooglePhotosUploader(self.config)
         
         self.logger = logging.getLogger(__name__)
+        
+        # UIDs of emails whose photos were already uploaded, so later runs skip them
+        self.processed_uids_file = os.path.join(
+            os.path.dirname(self.config['google_photos']['token_file']), 'processed_uids.json')
+        self._seen_uidvalidity = None
+        self._seen = self._load_processed_uids()
+        
+        # All configured subject keywords, matched in one regex search per email
+        self._subject_re = compile_subject_re(self.config['email'].get('subject_keywords') or [_SCHOOL_SUBJECT])
     
-    def _load_config(self) -> Dict:
+    def _load_config(self, config: Optional[Dict] = None) -> Dict:
         """
         Load configuration from YAML file.
         
+        Args:
+            config (Optional[Dict]): Already loaded configuration to validate instead
+            
         Returns:
             Dict: Configuration dictionary
             
@@ -67,8 +129,8 @@ class SchoolPhotoDownloader:
             yaml.YAMLError: If config file is malformed
         """
         try:
-            with open(self.config_path, 'r') as file:
-                config = yaml.safe_load(file)
+            if config is None:
+                config = load_config(self.config_path)
             
             # Validate required configuration sections
             required_sections = ['email', 'google_photos', 'downloads', 'logging']
@@ -89,6 +151,21 @@ class SchoolPhotoDownloader:
             print(f"Error loading configuration: {e}")
             sys.exit(1)
     
+    def _ensure_layout(self):
+        """
+        Create every directory the run writes to, once, at start-up.
+        
+        These are the log file's folder, the download folder and the folder holding
+        the Google Photos token and the state files kept next to it.
+        """
+        directories = {
+            Path(self.config['logging']['log_file']).parent,
+            Path(self.config['downloads'].get('temp_folder', './temp_downloads')),
+            Path(self.config['google_photos']['token_file']).parent,
+        }
+        for directory in directories:
+            directory.mkdir(parents=True, exist_ok=True)
+    
     def _setup_logging(self):
         """
         Set up logging configuration based on config file settings.
@@ -97,9 +174,6 @@ class SchoolPhotoDownloader:
         log_level = getattr(logging, log_config['level'].upper())
         log_file = log_config['log_file']
         
-        # Create logs directory if it doesn't exist
-        os.makedirs(os.path.dirname(log_file) if os.path.dirname(log_file) else '.', exist_ok=True)
-        
         # Configure logging
         logging.basicConfig(
             level=log_level,
@@ -110,6 +184,93 @@ class SchoolPhotoDownloader:
             ]
         )
     
+    def _load_processed_uids(self) -> set:
+        """
+        Load the UIDs of emails processed by earlier runs.
+        
+        The UIDVALIDITY they belong to is loaded into _seen_uidvalidity; files
+        written before it was recorded hold a bare list of UIDs.
+        
+        Returns:
+            set: Email UIDs (empty if nothing has been processed yet)
+        """
+        try:
+            with open(self.processed_uids_file, 'r') as uids_file:
+                processed = json.load(uids_file)
+        except (OSError, ValueError):
+            return set()
+        
+        if isinstance(processed, list):
+            return set(processed)
+        self._seen_uidvalidity = processed.get('uidvalidity')
+        return set(processed.get('uids', []))
+    
+    def _check_uidvalidity(self):
+        """
+        Forget the processed UIDs if the mailbox's UIDVALIDITY has changed.
+        
+        The server then numbers emails afresh, so an old UID may now belong to a
+        new email that would otherwise be skipped. Call after a search, which
+        reads the current value.
+        """
+        uidvalidity = self.email_monitor.get_uidvalidity()
+        if uidvalidity is None or uidvalidity == self._seen_uidvalidity:
+            return
+        
+        if self._seen_uidvalidity is not None and self._seen:
+            self.logger.info("Mailbox UIDVALIDITY changed; forgetting emails processed by earlier runs")
+            self._seen.clear()
+        self._seen_uidvalidity = uidvalidity
+    
+    def _mark_processed(self, email_ids: List[str]):
+        """
+        Record emails whose photos were uploaded, so later runs skip them.
+        
+        Args:
+            email_ids (List[str]): UIDs of the processed emails
+        """
+        self._check_uidvalidity()
+        self._seen.update(email_ids)
+        self._save_processed_uids()
+    
+    def _mark_uploaded_emails(self, files_by_email: Dict[str, List[str]], upload_results: Dict[str, bool]) -> bool:
+        """
+        Record the emails whose photos are all in Google Photos, so later runs skip them.
+        
+        An email with a photo that failed to upload is left for the next run; its
+        photos that did upload are then skipped by the uploader's ledger.
+        
+        Args:
+            files_by_email (Dict[str, List[str]]): Files downloaded from each email, by UID
+            upload_results (Dict[str, bool]): Whether each file is in Google Photos
+            
+        Returns:
+            bool: True if every email was recorded
+        """
+        done = [email_id for email_id, files in files_by_email.items()
+                if all(upload_results.get(file_path, False) for file_path in files)]
+        if done:
+            self._mark_processed(done)
+        
+        left = len(files_by_email) - len(done)
+        if left:
+            self.logger.warning(f"{left} emails had photos that failed to upload; they will be retried next run")
+        return not left
+    
+    def _save_processed_uids(self):
+        """
+        Save the processed email UIDs, replacing the file atomically so an
+        interrupted run never leaves it half-written.
+        """
+        try:
+            tmp_file = self.processed_uids_file + '.tmp'
+            with open(tmp_file, 'w') as uids_file:
+                json.dump({'uidvalidity': self._seen_uidvalidity,
+                           'uids': sorted(self._seen, key=int)}, uids_file)
+            os.replace(tmp_file, self.processed_uids_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save processed email UIDs: {str(e)}")
+    
     def _cleanup_temp_files(self, file_paths: List[str]):
         """
         Clean up temporary downloaded files after processing.
@@ -138,9 +299,12 @@ class SchoolPhotoDownloader:
         if not header_value:
             return ""
         
+        # Plain ASCII without RFC 2047 encoded words needs no decoding
+        if isinstance(header_value, str) and header_value.isascii() and '=?' not in header_value:
+            return header_value
+        
         try:
-            import email.header
-            decoded_parts = email.header.decode_header(header_value)
+            decoded_parts = decode_header(header_value)
             decoded_string = ""
             
             for part, encoding in decoded_parts:
@@ -160,6 +324,9 @@ class SchoolPhotoDownloader:
         """
         Check if an email was sent on a Friday.
         
+        The weekday is taken from the sender's own timezone, so a Friday evening
+        email is still a Friday email even though it is Saturday in UTC.
+        
         Args:
             email_date (str): Email date string
             
@@ -167,14 +334,82 @@ class SchoolPhotoDownloader:
             bool: True if email was sent on Friday
         """
         try:
-            # Parse email date (format: "Fri, 15 Dec 2023 14:30:00 +0000")
-            from email.utils import parsedate_to_datetime
+            # The date normally starts with the day name ("Fri, 15 Dec 2023 14:30:00 -0800"),
+            # which answers the question without parsing the rest
+            date_prefix = email_date.lstrip()[:4]
+            if date_prefix[3:] == ',':
+                return date_prefix[:3] == 'Fri'
+            
+            # The day name is optional, so fall back to parsing the full date
             parsed_date = parsedate_to_datetime(email_date)
             return parsed_date.weekday() == 4  # Friday is weekday 4
         except Exception:
             return False
     
-    def _enhanced_email_filtering(self, mail, email_ids: List[str]) -> List[str]:
+    def _fetch_headers(self, mail, email_ids: List[str]) -> Dict[str, Tuple[bytes, list]]:
+        """
+        Fetch the headers and structure of several emails with as few IMAP round-trips as possible.
+        
+        Only the HEADER_FIELDS headers are requested, UIDs are sent in batches of
+        HEADER_FETCH_BATCH_SIZE per FETCH command, and BODY.PEEK is used so the
+        emails are not marked as read. The BODYSTRUCTURE comes back in the same
+        response, so downloading the photos later does not need to ask for it again.
+        
+        Args:
+            mail: IMAP connection object
+            email_ids (List[str]): List of email UIDs to fetch
+            
+        Returns:
+            Dict[str, Tuple[bytes, list]]: Raw headers and parsed BODYSTRUCTURE keyed by UID
+        """
+        fetch_spec = f"(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({' '.join(HEADER_FIELDS)})])"
+        headers = {}
+        ids = iter(email_ids)
+        while True:
+            batch = list(islice(ids, HEADER_FETCH_BATCH_SIZE))
+            if not batch:
+                break
+            
+            status, data = mail.uid('FETCH', ','.join(batch), fetch_spec)
+            if status != 'OK':
+                self.logger.warning(f"Failed to fetch headers of emails {batch}")
+                continue
+            
+            for _, items in iter_fetch_response(data):
+                uid = items.get('UID')
+                # Servers may echo the field list back with different quoting, so
+                # match the item by its prefix rather than the exact name
+                header = next((value for key, value in items.items()
+                               if key.startswith('BODY[HEADER.FIELDS')), None)
+                if uid is not None and header is not None:
+                    headers[uid.decode()] = (header, items.get('BODYSTRUCTURE'))
+        
+        return headers
+    
+    def _parse_headers(self, header_blocks: List[bytes]) -> List[Tuple[str, str, str]]:
+        """
+        Parse header blocks, using all CPU cores when there are many of them.
+        
+        Args:
+            header_blocks (List[bytes]): Raw header blocks
+            
+        Returns:
+            List[Tuple[str, str, str]]: Raw From, Subject and Date of each block, in order
+        """
+        if len(header_blocks) < PARALLEL_PARSE_THRESHOLD:
+            return _parse_header_chunk(header_blocks)
+        
+        chunks = [header_blocks[i:i + HEADER_FETCH_BATCH_SIZE]
+                  for i in range(0, len(header_blocks), HEADER_FETCH_BATCH_SIZE)]
+        try:
+            with ProcessPoolExecutor() as pool:
+                return [row for rows in pool.map(_parse_header_chunk, chunks) for row in rows]
+        except Exception as e:
+            self.logger.warning(f"Parallel header parsing failed, parsing serially: {str(e)}")
+            return _parse_header_chunk(header_blocks)
+    
+    def _enhanced_email_filtering(self, mail, email_ids: List[str],
+                                  prefetched: Optional[Dict[str, Tuple[bytes, list]]] = None) -> List[str]:
         """
         Apply enhanced filtering to identify Westshore Montessori School emails.
         
@@ -182,9 +417,19 @@ class SchoolPhotoDownloader:
         "[Westshore Montessori School ]" and validates the expected pattern of
         2 emails typically sent on Fridays around 6:46 PM.
         
+        The email IDs come from EmailMonitor.search_school_emails, whose IMAP
+        SEARCH already matches the sender, subject and date on the server, so
+        normally every email passes. The sender and subject are still checked
+        here because server-side SUBJECT matching is case-insensitive (and on
+        Gmail ignores punctuation such as the brackets), so it can be looser
+        than the exact pattern.
+        
         Args:
             mail: IMAP connection object
-            email_ids (List[str]): List of email IDs to filter
+            email_ids (List[str]): List of email UIDs to filter, pre-filtered by the server
+            prefetched (Optional[Dict[str, Tuple[bytes, list]]]): If given, the fetched
+                headers and BODYSTRUCTURE of the emails that pass are stored in it, for
+                EmailMonitor.download_attachments to reuse
             
         Returns:
             List[str]: Filtered list of email IDs
@@ -193,61 +438,70 @@ class SchoolPhotoDownloader:
         friday_emails = []
         other_emails = []
         
+        # Loop invariants, bound once instead of looked up for every email
+        sender_needle = self.config['email']['sender_email'].lower()
+        log = self.logger
+        decode = self._decode_header
+        subject_re = self._subject_re
+        
+        # Skip emails already handled by an earlier run before fetching anything
+        self._check_uidvalidity()
+        new_ids = [email_id for email_id in email_ids if email_id not in self._seen]
+        if len(new_ids) < len(email_ids):
+            self.logger.info(f"Skipping {len(email_ids) - len(new_ids)} emails processed by earlier runs")
+        email_ids = new_ids
+        
+        # Fetch the headers of all emails up front, in batches
+        headers = self._fetch_headers(mail, email_ids) if email_ids else {}
+        fetched_ids = [email_id for email_id in email_ids if email_id in headers]
+        parsed = dict(zip(fetched_ids, self._parse_headers([headers[email_id][0] for email_id in fetched_ids])))
+        
         for email_id in email_ids:
             try:
-                # Fetch email headers
-                status, msg_data = mail.fetch(email_id, '(RFC822.HEADER)')
-                
-                if status != 'OK':
+                if email_id not in parsed:
                     continue
                 
-                email_body = msg_data[0][1]
-                import email
-                email_message = email.message_from_bytes(email_body)
-                
                 # Get email details
-                subject = email_message.get('Subject', '')
-                sender = email_message.get('From', '')
-                date = email_message.get('Date', '')
+                sender, subject, date = parsed[email_id]
                 
-                # Decode headers
-                subject = self._decode_header(subject)
-                sender = self._decode_header(sender)
-                
-                # Check if it's from the school
-                if self.config['email']['sender_email'].lower() not in sender.lower():
-                    self.logger.debug(f"Email {email_id} filtered out: not from school sender")
+                # Check if it's from the school. The address itself is never
+                # RFC 2047 encoded, so the raw header can be checked before any decoding
+                if sender_needle not in str(sender).lower():
+                    log.debug(f"Email {email_id} filtered out: not from school sender")
                     continue
                 
                 # Check for exact subject pattern match
-                expected_subject = "[Westshore Montessori School ]"
-                if expected_subject not in subject:
-                    self.logger.debug(f"Email {email_id} filtered out: subject doesn't match pattern")
+                subject = decode(subject)
+                if not subject_re.search(subject):
+                    log.debug(f"Email {email_id} filtered out: subject doesn't match pattern")
                     continue
                 
                 # Check if it's a Friday email (expected pattern)
                 is_friday = self._is_friday_email(date)
                 
-                # Log email details for debugging
-                self.logger.info(f"Westshore Montessori Email {email_id}:")
-                self.logger.info(f"  From: {sender}")
-                self.logger.info(f"  Subject: {subject}")
-                self.logger.info(f"  Date: {date}")
-                self.logger.info(f"  Is Friday: {is_friday}")
+                # One line per email at INFO; the full details only when debugging
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(f"Westshore Montessori Email {email_id}:")
+                    log.debug(f"  From: {decode(sender)}")
+                    log.debug(f"  Subject: {subject}")
+                    log.debug(f"  Date: {date}")
+                    log.debug(f"  Is Friday: {is_friday}")
                 
                 # Categorize emails
                 if is_friday:
                     friday_emails.append(email_id)
-                    self.logger.info(f"  ✅ Friday email - expected pattern")
+                    log.info(f"Westshore Montessori Email {email_id}: ✅ Friday email - {subject}")
                 else:
                     other_emails.append(email_id)
-                    self.logger.info(f"  ⚠️  Non-Friday email - unexpected timing")
+                    log.info(f"Westshore Montessori Email {email_id}: ⚠️  Non-Friday email - {subject}")
                 
                 # Include all emails that match the subject pattern
                 filtered_ids.append(email_id)
+                if prefetched is not None:
+                    prefetched[email_id] = headers[email_id]
                 
             except Exception as e:
-                self.logger.warning(f"Error filtering email {email_id}: {str(e)}")
+                log.warning(f"Error filtering email {email_id}: {str(e)}")
                 continue
         
         # Log summary of findings
@@ -285,76 +539,156 @@ class SchoolPhotoDownloader:
         try:
             # Step 1: Connect to email and find school emails
             self.logger.info("Step 1: Connecting to email and searching for school emails")
+            # The connection from an earlier run is reused if it is still alive; it is
+            # left open afterwards and logged out when the process exits
             mail = self.email_monitor.connect_to_email()
             if not mail:
                 self.logger.error("Failed to connect to email server")
                 return False
             
+            # Search for emails from school
+            email_ids = self.email_monitor.search_school_emails(mail, days_back)
+            
+            if not email_ids:
+                self.logger.info("No school emails found")
+                return True
+            
+            # Sender, subject and date were already matched by the server-side
+            # SEARCH; the enhanced filtering confirms the exact subject and
+            # classifies the emails by weekday
+            self.logger.info(f"Found {len(email_ids)} potential school emails, applying enhanced filtering...")
+            # The headers and structure fetched while filtering are kept, so the
+            # download step goes straight to fetching the photo parts
+            prefetched = {}
+            filtered_email_ids = self._enhanced_email_filtering(mail, email_ids, prefetched)
+            
+            if not filtered_email_ids:
+                self.logger.info("No emails passed the enhanced filtering criteria")
+                return True
+            
+            self.logger.info(f"Found {len(filtered_email_ids)} emails that match school photo criteria")
+            
+            # Authenticate with Google Photos in the background while the photos
+            # download, so the token refresh and service build are off the
+            # critical path; step 3 waits for the result. Only done when the saved
+            # token suffices: a browser login is left to step 3, on this thread,
+            # once there are photos to upload
+            auth_future = None
+            if self.google_uploader.can_authenticate_silently():
+                auth_executor = ThreadPoolExecutor(max_workers=1)
+                auth_future = auth_executor.submit(self.google_uploader.ensure_authenticated)
+                auth_executor.shutdown(wait=False)
+            
+            # Step 2: Download photo attachments, into a folder of this run's own
+            # so the cleanup is a single rmtree
+            self.logger.info("Step 2: Downloading photo attachments")
+            run_dir = os.path.join(self.email_monitor.temp_folder, uuid.uuid4().hex)
+            os.makedirs(run_dir, exist_ok=True)
+            # Steps 2-5 run in a try, so the run folder and the photos in it are
+            # removed whether the run succeeds, fails or raises
             try:
-                # Search for emails from school
-                email_ids = self.email_monitor.search_school_emails(mail, days_back)
+                files_by_email = {}
+                downloaded_files = self.email_monitor.download_attachments(
+                    mail, filtered_email_ids, prefetched, dest_folder=run_dir, files_by_email=files_by_email)
                 
-                if not email_ids:
-                    self.logger.info("No school emails found")
+                if not downloaded_files:
+                    self.logger.info("No photo attachments found in school emails")
                     return True
                 
-                # Apply enhanced filtering
-                self.logger.info(f"Found {len(email_ids)} potential school emails, applying enhanced filtering...")
-                filtered_email_ids = self._enhanced_email_filtering(mail, email_ids)
-                
-                if not filtered_email_ids:
-                    self.logger.info("No emails passed the enhanced filtering criteria")
-                    return True
+                self.logger.info(f"Downloaded {len(downloaded_files)} photo files")
                 
-                self.logger.info(f"Found {len(filtered_email_ids)} emails that match school photo criteria")
+                # Step 3: Authenticate with Google Photos
+                self.logger.info("Step 3: Authenticating with Google Photos")
+                authenticated = (auth_future.result() if auth_future is not None
+                                 else self.google_uploader.ensure_authenticated())
+                if not authenticated:
+                    self.logger.error("Failed to authenticate with Google Photos")
+                    return False
                 
-                # Step 2: Download photo attachments
-                self.logger.info("Step 2: Downloading photo attachments")
-                downloaded_files = self.email_monitor.download_attachments(mail, filtered_email_ids)
+                # Step 4: Upload photos to Google Photos
+                # The uploader sends the photo bytes on a thread pool and creates the
+                # media items in batches of up to 50 while later photos are still uploading
+                self.logger.info(f"Step 4: Uploading {len(downloaded_files)} photos to Google Photos "
+                                 f"({self.google_uploader.upload_concurrency} at a time)")
+                upload_results = {}
+                upload_success = self.google_uploader.upload_photos(downloaded_files, upload_results)
                 
-                if not downloaded_files:
-                    self.logger.info("No photo attachments found in school emails")
-                    return True
+                if upload_success:
+                    self.logger.info("Successfully processed school photos!")
+                    self._mark_uploaded_emails(files_by_email, upload_results)
+                else:
+                    self.logger.error("Failed to upload photos to Google Photos")
+                    return False
                 
-                self.logger.info(f"Downloaded {len(downloaded_files)} photo files")
+                self.logger.info("=" * 60)
+                self.logger.info("School photo processing completed successfully!")
+                self.logger.info("=" * 60)
                 
+                return True
             finally:
-                # Always close email connection
-                try:
-                    mail.close()
-                    mail.logout()
-                except Exception as e:
-                    self.logger.warning(f"Error closing email connection: {str(e)}")
+                # Step 5: Cleanup temporary files
+                self.logger.info("Step 5: Cleaning up temporary files")
+                shutil.rmtree(run_dir, ignore_errors=True)
+                self.logger.debug(f"Removed temporary folder: {run_dir}")
             
-            # Step 3: Authenticate with Google Photos
-            self.logger.info("Step 3: Authenticating with Google Photos")
-            if not self.google_uploader.authenticate():
-                self.logger.error("Failed to authenticate with Google Photos")
-                return False
-            
-            # Step 4: Upload photos to Google Photos
-            self.logger.info("Step 4: Uploading photos to Google Photos")
-            upload_success = self.google_uploader.upload_photos(downloaded_files)
+        except Exception as e:
+            self.logger.error(f"Error in main processing: {str(e)}")
+            return False
+    
+    def _upload_new_photos(self, downloaded_files: List[str], files_by_email: Dict[str, List[str]]) -> bool:
+        """
+        Upload photos found by the IMAP IDLE loop and clean them up afterwards.
+        
+        Args:
+            downloaded_files (List[str]): Paths of the downloaded photos
+            files_by_email (Dict[str, List[str]]): The photos of each email, by UID
             
-            if upload_success:
-                self.logger.info("Successfully processed school photos!")
-            else:
-                self.logger.error("Failed to upload photos to Google Photos")
+        Returns:
+            bool: True if the photos of every email are in Google Photos
+        """
+        try:
+            if not self.google_uploader.ensure_authenticated():
+                self.logger.error("Failed to authenticate with Google Photos")
                 return False
             
-            # Step 5: Cleanup temporary files
-            self.logger.info("Step 5: Cleaning up temporary files")
-            self._cleanup_temp_files(downloaded_files)
-            
-            self.logger.info("=" * 60)
-            self.logger.info("School photo processing completed successfully!")
-            self.logger.info("=" * 60)
-            
-            return True
+            upload_results = {}
+            if self.google_uploader.upload_photos(downloaded_files, upload_results):
+                self.logger.info(f"Uploaded {sum(upload_results.values())} new school photos")
+                return self._mark_uploaded_emails(files_by_email, upload_results)
             
+            self.logger.error("Failed to upload photos to Google Photos")
+            return False
+                
         except Exception as e:
-            self.logger.error(f"Error in main processing: {str(e)}")
+            self.logger.error(f"Error uploading new photos: {str(e)}")
             return False
+        finally:
+            # The IDLE loop downloads the photos again when it retries
+            self._cleanup_temp_files(downloaded_files)
+    
+    def run_forever(self, days_back: int = 7):
+        """
+        Process existing school emails once, then keep watching for new ones.
+        
+        After the initial run, the IMAP connection is kept open with IDLE so the
+        server announces new mail as it arrives; there is no polling and no login
+        per check. Runs until interrupted.
+        
+        Args:
+            days_back (int): Number of days to look back for emails on the initial run
+        """
+        # The newest UID is read before the initial run, so emails arriving while it
+        # runs are picked up by the IDLE loop; the ledger skips photos seen by both
+        start_uid = None
+        mail = self.email_monitor.connect_to_email()
+        if mail:
+            try:
+                start_uid = self.email_monitor.highest_uid(mail)
+            except (imaplib.IMAP4.error, OSError) as e:
+                self.logger.warning(f"Could not read the newest email UID before the initial run: {str(e)}")
+        
+        self.process_school_photos(days_back)
+        self.email_monitor.idle_loop(on_new_photos=self._upload_new_photos, days_back=1, start_uid=start_uid)
 
 
 def main():
@@ -369,6 +703,7 @@ Examples:
     python school_photo_downloader.py
     python school_photo_downloader.py --config my_config.yaml
     python school_photo_downloader.py --days-back 14
+    python school_photo_downloader.py --watch
         """
     )
     
@@ -385,6 +720,12 @@ Examples:
         help='Number of days to look back for school emails (default: 7)'
     )
     
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and process new school emails as they arrive (IMAP IDLE)'
+    )
+    
     args = parser.parse_args()
     
     # Check if config file exists
@@ -397,6 +738,10 @@ Examples:
     downloader = SchoolPhotoDownloader(args.config)
     
     try:
+        if args.watch:
+            downloader.run_forever(args.days_back)
+            sys.exit(0)
+        
         success = downloader.process_school_photos(args.days_back)
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
@@ -7,8 +7,10 @@ by creating the necessary configuration files and directories.
 """
 
 import os
+import re
 import sys
 import shutil
+from importlib.metadata import distributions
 from pathlib import Path
 
 
@@ -20,7 +22,7 @@ def create_directories():
     ]
     
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+        Path(directory).mkdir(parents=True, exist_ok=True)
         print(f"✅ Created directory: {directory}")
 
 
@@ -58,13 +60,13 @@ def check_dependencies():
         "schedule"
     ]
     
-    missing_packages = []
+    # Names of the installed distributions, read from their metadata without
+    # importing any package; normalized so e.g. "PyYAML" matches "pyyaml"
+    def normalize(name):
+        return re.sub(r'[-_.]+', '-', name).lower()
     
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+    installed = {normalize(dist.metadata['Name']) for dist in distributions() if dist.metadata['Name']}
+    missing_packages = [package for package in required_packages if normalize(package) not in installed]
     
     if missing_packages:
         print("❌ Missing required packages:")
@@ -9,6 +9,12 @@ import os
 import sys
 from pathlib import Path
 
+# orjson is faster at both parsing and dumping; the stdlib json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def load_config():
     """Load the local configuration file"""
     config_path = "config.yaml"
@@ -18,8 +24,9 @@ def load_config():
         return None
     
     import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
     with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=loader)
 
 def load_google_credentials():
     """Load Google Photos credentials"""
@@ -28,6 +35,10 @@ def load_google_credentials():
         print(f"❌ Google Photos credentials not found: {creds_path}")
         return None
     
+    if orjson:
+        with open(creds_path, 'rb') as f:
+            return orjson.loads(f.read())
+    
     with open(creds_path, 'r') as f:
         return json.load(f)
 
@@ -74,7 +85,10 @@ def main():
     print("4. GOOGLE_PHOTOS_CREDENTIALS")
     print("   Value: (JSON content below)")
     print("   " + "=" * 50)
-    print(json.dumps(google_creds, indent=2))
+    if orjson:
+        print(orjson.dumps(google_creds, option=orjson.OPT_INDENT_2).decode())
+    else:
+        print(json.dumps(google_creds, indent=2))
     print("   " + "=" * 50)
     print()
     
@@ -9,10 +9,10 @@ by guiding you through the OAuth2 flow and testing the connection.
 import os
 import sys
 import json
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+# The Google client libraries are imported inside the functions that use them:
+# googleapiclient in particular is slow to import, and the first check only needs
+# to know whether the credential files exist
 
 
 # Google Photos API scopes
@@ -26,6 +26,8 @@ def setup_google_photos_auth():
     This function guides the user through the OAuth2 flow and saves
     the credentials for future use.
     """
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    
     print("=" * 60)
     print("Google Photos API Setup")
     print("=" * 60)
@@ -63,7 +65,8 @@ def setup_google_photos_auth():
         
         # Test the connection
         print("\n🧪 Testing Google Photos API connection...")
-        service = build('photoslibrary', 'v1', credentials=creds)
+        from google_photos_uploader import build_photos_service
+        service = build_photos_service(credentials=creds)
         
         # Try to list albums to test the connection
         albums_response = service.albums().list(pageSize=1).execute()
@@ -92,6 +95,9 @@ def test_existing_auth():
         print(f"❌ Token file not found: {token_file}")
         return False
     
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    
     try:
         print("🔄 Testing existing authentication...")
         
@@ -113,7 +119,8 @@ def test_existing_auth():
                 return False
         
         # Test the connection
-        service = build('photoslibrary', 'v1', credentials=creds)
+        from google_photos_uploader import build_photos_service
+        service = build_photos_service(credentials=creds)
         albums_response = service.albums().list(pageSize=1).execute()
         albums = albums_response.get('albums', [])
         
@@ -6,11 +6,17 @@ This script helps set up Google Photos API with proper permissions.
 
 import os
 import json
+import functools
 import webbrowser
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+
+# orjson parses faster than the stdlib json module; json is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Google Photos API scopes - these are the correct ones
 SCOPES = [
@@ -18,6 +24,70 @@ SCOPES = [
     'https://www.googleapis.com/auth/photoslibrary.appendonly'
 ]
 
+@functools.lru_cache(maxsize=1)
+def _read_client_secrets(path: str, mtime: float) -> dict:
+    """
+    Read and parse the OAuth client secrets file.
+    
+    Cached on the file's path and modification time, so calling setup more than
+    once in a process parses the file once, while an edited file is read again.
+    
+    Args:
+        path (str): Path to the client secrets file
+        mtime (float): Modification time of the file, part of the cache key
+        
+    Returns:
+        dict: Parsed client secrets
+    """
+    if orjson:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+@functools.lru_cache(maxsize=1)
+def _load_token(path: str, mtime: float) -> Credentials:
+    """
+    Load the saved OAuth token.
+    
+    Cached on the file's path and modification time, so the same Credentials
+    object (refreshed in memory when needed) is reused by later calls in the
+    process until the token file is written again.
+    
+    Args:
+        path (str): Path to the token file
+        mtime (float): Modification time of the file, part of the cache key
+        
+    Returns:
+        Credentials: The saved credentials
+    """
+    return Credentials.from_authorized_user_file(path, SCOPES)
+
+def _save_token(path: str, token_json: str) -> bool:
+    """
+    Write the OAuth token to disk.
+    
+    The token is written to a temporary file that then replaces the old one, so
+    an interrupted write never leaves a half-written token behind.
+    
+    Args:
+        path (str): Path to the token file
+        token_json (str): Serialized credentials
+        
+    Returns:
+        bool: True if the token was saved
+    """
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as token:
+            token.write(token_json)
+        os.replace(tmp_path, path)
+        print(f"💾 Credentials saved to {path}")
+        return True
+    except Exception as e:
+        print(f"❌ Error saving credentials: {e}")
+        return False
+
 def setup_google_photos():
     """Set up Google Photos API with proper authentication."""
     
@@ -47,8 +117,7 @@ def setup_google_photos():
     
     # Load credentials
     try:
-        with open(credentials_file, 'r') as f:
-            creds_data = json.load(f)
+        creds_data = _read_client_secrets(credentials_file, os.path.getmtime(credentials_file))
         
         # Extract client info
         client_info = creds_data.get('installed', creds_data.get('web', {}))
@@ -63,25 +132,22 @@ def setup_google_photos():
         print(f"❌ Error reading credentials: {e}")
         return False
     
-    # Set up OAuth flow
-    flow = InstalledAppFlow.from_client_secrets_file(
-        credentials_file, 
-        SCOPES,
-        redirect_uri='http://localhost:8080'
-    )
-    
     creds = None
+    token_changed = True
+    refreshed = False
     
     # Check if we have existing valid credentials
     if os.path.exists(token_file):
         print("🔄 Loading existing credentials...")
         try:
-            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+            creds = _load_token(token_file, os.path.getmtime(token_file))
             if creds and creds.valid:
                 print("✅ Using existing valid credentials")
+                token_changed = False
             elif creds and creds.expired and creds.refresh_token:
                 print("🔄 Refreshing expired credentials...")
                 creds.refresh(Request())
+                refreshed = True
             else:
                 print("❌ Invalid credentials, need to re-authenticate")
                 creds = None
@@ -96,19 +162,24 @@ def setup_google_photos():
         print()
         
         try:
+            # Set up OAuth flow, only needed when the saved token cannot be used
+            flow = InstalledAppFlow.from_client_config(
+                creds_data, 
+                SCOPES,
+                redirect_uri='http://localhost:8080'
+            )
             creds = flow.run_local_server(port=8080)
             print("✅ Authentication successful!")
         except Exception as e:
             print(f"❌ Authentication failed: {e}")
             return False
     
-    # Save credentials
-    try:
-        with open(token_file, 'w') as token:
-            token.write(creds.to_json())
-        print(f"💾 Credentials saved to {token_file}")
-    except Exception as e:
-        print(f"❌ Error saving credentials: {e}")
+    # Save credentials, unless the token file already holds exactly these. Failing to
+    # save a refreshed token only means refreshing again next time, so setup goes on;
+    # losing a new token means going through the browser again, so that stops it
+    if refreshed:
+        _save_token(token_file, creds.to_json())
+    elif token_changed and not _save_token(token_file, creds.to_json()):
         return False
     
     # Test the API connection
@@ -116,7 +187,10 @@ def setup_google_photos():
     print("🧪 Testing Google Photos API connection...")
     
     try:
-        service = build('photoslibrary', 'v1', credentials=creds, static_discovery=False)
+        # Imported here so the client library is only loaded once it is needed;
+        # the discovery document is read from the local cache after the first run
+        from google_photos_uploader import build_photos_service
+        service = build_photos_service(credentials=creds)
         
         # Try to list some media items to test the connection
         request = service.mediaItems().list(pageSize=1)
@@ -4,10 +4,12 @@ Simple School Photo Downloader
 Downloads photos from school emails and saves them locally with proper organization.
 """
 
+import errno
 import os
+import shutil
 import sys
-import yaml
 from datetime import datetime
+from config_loader import load_config
 from email_monitor import EmailMonitor
 
 def main():
@@ -18,8 +20,7 @@ def main():
     
     # Load configuration
     try:
-        with open('config.yaml', 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config('config.yaml')
     except FileNotFoundError:
         print("❌ Error: config.yaml not found")
         return False
@@ -43,12 +44,12 @@ def main():
             print("❌ Failed to connect to email")
             return False
         
-        # Search for school emails
-        print("🔍 Searching for school emails...")
-        email_ids = email_monitor.search_school_emails(mail, days_back=7)
+        # Search for school emails that arrived since the last run
+        print("🔍 Searching for new school emails...")
+        email_ids = email_monitor.search_school_emails(mail, days_back=7, only_new=True)
         
         if not email_ids:
-            print("ℹ️  No school emails found")
+            print("ℹ️  No new school emails found")
             return True
         
         print(f"✅ Found {len(email_ids)} school emails")
@@ -61,16 +62,26 @@ def main():
         if photos:
             print(f"✅ Downloaded {len(photos)} photos total")
             
-            # Move photos to organized directory
-            for i, photo_path in enumerate(photos, 1):
-                filename = os.path.basename(photo_path)
-                # Create a cleaner filename
-                clean_filename = f"photo_{i:02d}_{filename}"
-                new_path = os.path.join(output_dir, clean_filename)
-                
-                # Move the file
-                os.rename(photo_path, new_path)
-                print(f"💾 Saved: {clean_filename}")
+            # Work out every cleaner filename up front, so the loop below only moves files
+            clean_filenames = [f"photo_{i:02d}_{os.path.basename(photo_path)}" for i, photo_path in enumerate(photos, 1)]
+            targets = [(photo_path, os.path.join(output_dir, clean_filename))
+                       for photo_path, clean_filename in zip(photos, clean_filenames)]
+            
+            # Move photos to organized directory; a rename only works within one
+            # filesystem, so copy across when the download folder is on another device
+            for photo_path, new_path in targets:
+                try:
+                    os.replace(photo_path, new_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    shutil.move(photo_path, new_path)
+            
+            # Print the list once at the end, in a single write
+            sys.stdout.write("".join(f"💾 Saved: {clean_filename}\n" for clean_filename in clean_filenames))
+            
+            # Skip these emails on the next run
+            email_monitor.remember_emails(email_ids)
             
             total_photos = len(photos)
         else:
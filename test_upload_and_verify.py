@@ -5,17 +5,17 @@ This will help us debug why photos aren't appearing in Google Photos.
 """
 
 import os
+import re
 import sys
-import yaml
 import json
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import sleep
+from config_loader import load_config
 from google_photos_uploader import GooglePhotosUploader
 from email_monitor import EmailMonitor
 
-def load_config(config_path: str = "config.yaml"):
-    """Load configuration from YAML file"""
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+# Photo files left in temp_downloads by earlier runs
+_IMG_EXT = re.compile(r'\.(?:jpe?g|png|gif|heic|webp)$', re.IGNORECASE)
 
 def test_upload_and_verify():
     """Test uploading photos and verifying they appear in the library"""
@@ -29,7 +29,10 @@ def test_upload_and_verify():
     
     # Step 1: Get some test photos
     print("\n📸 Step 1: Getting test photos...")
-    email_monitor = EmailMonitor(config)
+    # Its own cache file, so emails used for testing are not skipped by simple_photo_downloader.py
+    email_monitor = EmailMonitor(config, cache_file=".upload_test_email_cache.json")
+    # Emails whose photos are tested; remembered only once the test has passed
+    email_ids = []
     
     try:
         mail = email_monitor.connect_to_email()
@@ -37,22 +40,24 @@ def test_upload_and_verify():
             print("❌ Failed to connect to email")
             return False
         
-        # Search for recent school emails
-        email_ids = email_monitor.search_school_emails(mail, days_back=7)
+        # Search for school emails that arrived since the last run; photos from
+        # earlier runs are still in temp_downloads and are used below instead
+        email_ids = email_monitor.search_school_emails(mail, days_back=7, only_new=True)
         
         if not email_ids:
             print("ℹ️  No school emails found, using existing photos...")
             # Look for existing photos in temp_downloads
             temp_dir = "temp_downloads"
-            if os.path.exists(temp_dir):
-                existing_photos = [os.path.join(temp_dir, f) for f in os.listdir(temp_dir) 
-                                 if f.lower().endswith(('.jpg', '.jpeg', '.png', '.gif'))]
-                if existing_photos:
-                    print(f"✅ Found {len(existing_photos)} existing photos to test with")
-                    test_photos = existing_photos[:3]  # Test with first 3 photos
-                else:
-                    print("❌ No photos available for testing")
-                    return False
+            try:
+                # One directory read; the entries know whether they are files without a stat call each
+                with os.scandir(temp_dir) as it:
+                    existing_photos = [entry for entry in it if entry.is_file() and _IMG_EXT.search(entry.name)]
+            except FileNotFoundError:
+                existing_photos = []
+            if existing_photos:
+                print(f"✅ Found {len(existing_photos)} existing photos to test with")
+                test_photos = [entry.path for entry in existing_photos[:3]]  # Test with first 3 photos
+                photo_sizes = {entry.path: entry.stat().st_size for entry in existing_photos[:3]}
             else:
                 print("❌ No photos available for testing")
                 return False
@@ -64,11 +69,12 @@ def test_upload_and_verify():
                 print("❌ No photos downloaded from emails")
                 return False
             test_photos = photos[:3]  # Test with first 3 photos
+            photo_sizes = {photo: os.path.getsize(photo) for photo in test_photos}
         
         print(f"📸 Testing with {len(test_photos)} photos:")
         for i, photo in enumerate(test_photos, 1):
             filename = os.path.basename(photo)
-            size = os.path.getsize(photo)
+            size = photo_sizes[photo]
             print(f"  {i}. {filename} ({size:,} bytes)")
         
         mail.logout()
@@ -87,44 +93,31 @@ def test_upload_and_verify():
     
     print("✅ Successfully authenticated with Google Photos")
     
-    # Step 3: Get library state BEFORE upload
-    print("\n📚 Step 3: Checking library state BEFORE upload...")
-    try:
-        # Get recent photos from library
-        request = uploader.service.mediaItems().list(pageSize=10)
-        response_before = request.execute()
-        photos_before = response_before.get('mediaItems', [])
-        
-        print(f"📊 Library state before upload:")
-        print(f"  - Recent photos count: {len(photos_before)}")
-        if photos_before:
-            print(f"  - Most recent photo: {photos_before[0].get('filename', 'Unknown')}")
-            print(f"  - Most recent photo ID: {photos_before[0].get('id', 'Unknown')}")
-        else:
-            print("  - No photos found in library")
+    # Step 3: Upload test photos
+    print(f"\n⬆️  Step 3: Uploading {len(test_photos)} test photos...")
+    
+    # Upload the photos concurrently; the tokens are kept in the photos' order
+    tokens = [None] * len(test_photos)
+    with ThreadPoolExecutor(max_workers=uploader.upload_concurrency) as executor:
+        futures = {executor.submit(uploader.upload_photo, photo_path): i
+                   for i, photo_path in enumerate(test_photos)}
+        for future in as_completed(futures):
+            i = futures[future]
+            filename = os.path.basename(test_photos[i])
+            print(f"\n📤 Uploaded photo {i + 1}/{len(test_photos)}: {filename}")
             
-    except Exception as e:
-        print(f"⚠️  Could not check library state before upload: {str(e)}")
-        photos_before = []
-    
-    # Step 4: Upload test photos
-    print(f"\n⬆️  Step 4: Uploading {len(test_photos)} test photos...")
+            try:
+                token = future.result()
+                if token:
+                    tokens[i] = token
+                    print(f"✅ Upload successful, token: {token[:50]}...")
+                else:
+                    print(f"❌ Upload failed for {filename}")
+                    
+            except Exception as e:
+                print(f"❌ Upload error for {filename}: {str(e)}")
     
-    uploaded_tokens = []
-    for i, photo_path in enumerate(test_photos, 1):
-        print(f"\n📤 Uploading photo {i}/{len(test_photos)}: {os.path.basename(photo_path)}")
-        
-        try:
-            # Upload the photo
-            token = uploader.upload_photo(photo_path)
-            if token:
-                uploaded_tokens.append(token)
-                print(f"✅ Upload successful, token: {token[:50]}...")
-            else:
-                print(f"❌ Upload failed for {os.path.basename(photo_path)}")
-                
-        except Exception as e:
-            print(f"❌ Upload error for {os.path.basename(photo_path)}: {str(e)}")
+    uploaded_tokens = [token for token in tokens if token]
     
     print(f"\n📊 Upload Summary:")
     print(f"  - Photos attempted: {len(test_photos)}")
@@ -134,79 +127,53 @@ def test_upload_and_verify():
         print("❌ No photos were successfully uploaded")
         return False
     
-    # Step 5: Wait a moment for photos to process
-    print(f"\n⏳ Step 5: Waiting for photos to process in Google Photos...")
-    import time
-    time.sleep(5)  # Wait 5 seconds for processing
-    
-    # Step 6: Check library state AFTER upload
-    print(f"\n🔍 Step 6: Checking library state AFTER upload...")
-    try:
-        # Get recent photos from library
-        request = uploader.service.mediaItems().list(pageSize=20)
-        response_after = request.execute()
-        photos_after = response_after.get('mediaItems', [])
-        
-        print(f"📊 Library state after upload:")
-        print(f"  - Recent photos count: {len(photos_after)}")
-        
-        # Compare before and after
-        new_photos = len(photos_after) - len(photos_before)
-        print(f"  - New photos detected: {new_photos}")
-        
-        if photos_after:
-            print(f"\n📸 Most recent photos in library:")
-            for i, photo in enumerate(photos_after[:5], 1):
-                filename = photo.get('filename', 'Unknown')
-                photo_id = photo.get('id', 'Unknown')
-                creation_time = photo.get('mediaMetadata', {}).get('creationTime', 'Unknown')
-                print(f"  {i}. {filename}")
-                print(f"     ID: {photo_id}")
-                print(f"     Created: {creation_time}")
-                print()
-        else:
-            print("  - No photos found in library")
-            
-    except Exception as e:
-        print(f"❌ Could not check library state after upload: {str(e)}")
+    # Turn the upload tokens into library items with batched requests (up to 50 per call)
+    media_item_ids = [media_item_id for media_item_id in uploader.create_media_items(uploaded_tokens) if media_item_id]
+    if not media_item_ids:
+        print("❌ Failed to create media items from the upload tokens")
         return False
+    print(f"✅ Created {len(media_item_ids)}/{len(uploaded_tokens)} media items")
     
-    # Step 7: Try to find our specific uploaded photos
-    print(f"\n🔍 Step 7: Searching for our uploaded photos...")
+    # Step 4: Wait for the photos to show up in Google Photos
+    print(f"\n⏳ Step 4: Waiting for photos to process in Google Photos...")
     try:
-        # Search for photos uploaded in the last few minutes
-        now = datetime.now()
-        recent_time = now - timedelta(minutes=10)
-        
-        found_our_photos = []
-        for photo in photos_after:
-            creation_time_str = photo.get('mediaMetadata', {}).get('creationTime', '')
-            if creation_time_str:
-                try:
-                    # Parse the creation time
-                    creation_time = datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
-                    if creation_time > recent_time:
-                        found_our_photos.append(photo)
-                except:
-                    pass
-        
-        print(f"📊 Photos uploaded in last 10 minutes: {len(found_our_photos)}")
-        
-        if found_our_photos:
-            print(f"✅ Found our uploaded photos!")
-            for i, photo in enumerate(found_our_photos, 1):
-                filename = photo.get('filename', 'Unknown')
-                photo_id = photo.get('id', 'Unknown')
-                print(f"  {i}. {filename} (ID: {photo_id})")
-        else:
-            print(f"❌ Could not find our uploaded photos in the library")
-            print(f"   This suggests the uploads may not have been processed correctly")
-            
+        # batchGet returns exactly the items we created, without scanning the library;
+        # poll it with growing pauses and stop as soon as all of them are visible
+        for delay in (0.1, 0.2, 0.4, 0.8, 1.6, 3.2, None):
+            response_after = uploader.service.mediaItems().batchGet(mediaItemIds=media_item_ids).execute()
+            found_our_photos = [result['mediaItem'] for result in response_after.get('mediaItemResults', [])
+                                if 'mediaItem' in result]
+            if len(found_our_photos) == len(media_item_ids) or delay is None:
+                break
+            sleep(delay)
     except Exception as e:
-        print(f"❌ Error searching for our photos: {str(e)}")
+        print(f"❌ Could not look up our uploaded photos: {str(e)}")
+        return False
     
-    # Step 8: Test album functionality
-    print(f"\n📁 Step 8: Testing album functionality...")
+    # Step 5: Report our uploaded photos
+    print(f"\n🔍 Step 5: Checking our uploaded photos...")
+    print(f"📊 Uploaded photos found in library: {len(found_our_photos)}/{len(media_item_ids)}")
+    
+    if found_our_photos:
+        print(f"✅ Found our uploaded photos!")
+        for i, photo in enumerate(found_our_photos, 1):
+            filename = photo.get('filename', 'Unknown')
+            photo_id = photo.get('id', 'Unknown')
+            creation_time = photo.get('mediaMetadata', {}).get('creationTime', 'Unknown')
+            print(f"  {i}. {filename}")
+            print(f"     ID: {photo_id}")
+            print(f"     Created: {creation_time}")
+            print()
+    else:
+        print(f"❌ Could not find our uploaded photos in the library")
+        print(f"   This suggests the uploads may not have been processed correctly")
+    
+    # Only a fully verified run marks its emails as handled, so a failed one tests them again
+    if len(found_our_photos) == len(media_item_ids) == len(test_photos):
+        email_monitor.remember_emails(email_ids)
+    
+    # Step 6: Test album functionality
+    print(f"\n📁 Step 6: Testing album functionality...")
     try:
         # Try to list albums
         albums_request = uploader.service.albums().list(pageSize=10)
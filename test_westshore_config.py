@@ -8,8 +8,8 @@ is working correctly with the Westshore Montessori School email pattern.
 
 import os
 import sys
-import yaml
 from datetime import datetime, timedelta
+from config_loader import load_config
 from school_photo_downloader import SchoolPhotoDownloader
 
 
@@ -28,8 +28,7 @@ def test_configuration():
     
     # Load configuration
     try:
-        with open(config_file, 'r') as file:
-            config = yaml.safe_load(file)
+        config = load_config(config_file)
         print(f"✅ Configuration file loaded: {config_file}")
     except Exception as e:
         print(f"❌ Error loading configuration: {e}")
@@ -61,7 +60,7 @@ def test_configuration():
     # Test email connection
     print("\n🔌 Testing Email Connection:")
     try:
-        downloader = SchoolPhotoDownloader(config_file)
+        downloader = SchoolPhotoDownloader(config_file, config=config)
         print("  ✅ SchoolPhotoDownloader initialized successfully")
         
         # Test email connection
@@ -0,0 +1,222 @@
+"""
+Tests for EmailMonitor.idle_loop, run against a fake IMAP server.
+
+The fake speaks just enough IMAP for the loop: SELECT, UID SEARCH and the IDLE
+exchange driven by EmailMonitor._idle. Downloading is replaced by a stub, so
+the tests cover which emails the loop hands on and when it retries them.
+
+Run from the project root with:
+    python -m unittest discover tests
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import email_monitor
+from email_monitor import EmailMonitor
+
+
+class StopWatching(Exception):
+    """Raised by the fake server when its script of IDLE events has run out."""
+
+
+class FakeServer:
+    """
+    Mailbox state and the scripted IDLE events shared by every connection to it.
+    
+    Each event is used by one IDLE command:
+        ('mail', uid): an email with this UID arrives and EXISTS is sent
+        ('timeout',): nothing arrives before the IDLE times out
+        ('reject',): the server refuses the IDLE command
+    """
+    
+    def __init__(self, uids, events):
+        self.uids = list(uids)
+        self.events = list(events)
+        self.connections = []
+    
+    def connect(self, *args):
+        connection = FakeIMAP(self)
+        self.connections.append(connection)
+        return connection
+
+
+class FakeIMAP:
+    """A logged-in connection to a FakeServer, standing in for imaplib.IMAP4_SSL."""
+    
+    capabilities = ('IMAP4REV1', 'IDLE')
+    
+    def __init__(self, server):
+        self.server = server
+        self.lines = []
+        self.timeout_pending = False
+        self.tag_number = 0
+        self.idle_tag = None
+        self.tagged_commands = {}
+        self.logged_out = False
+        self.file = mock.Mock()
+        self.sock = mock.Mock()
+    
+    def login(self, username, password):
+        return 'OK', [b'Logged in']
+    
+    def logout(self):
+        self.logged_out = True
+        return 'BYE', [b'']
+    
+    def noop(self):
+        return 'OK', [b'']
+    
+    def select(self, mailbox):
+        return 'OK', [str(len(self.server.uids)).encode()]
+    
+    def response(self, code):
+        if code == 'UIDNEXT':
+            return code, [str(max(self.server.uids, default=0) + 1).encode()]
+        return code, [b'1']
+    
+    def uid(self, command, charset, criteria):
+        return 'OK', [' '.join(str(uid) for uid in self.server.uids).encode()]
+    
+    def _new_tag(self):
+        self.tag_number += 1
+        return f'A{self.tag_number:03d}'.encode()
+    
+    def send(self, data):
+        if data.endswith(b' IDLE\r\n'):
+            self.idle_tag = data.split()[0]
+            if not self.server.events:
+                raise StopWatching()
+            event = self.server.events.pop(0)
+            if event[0] == 'reject':
+                self.lines.append(self.idle_tag + b' BAD IDLE not allowed now')
+                return
+            self.lines.append(b'+ idling')
+            if event[0] == 'mail':
+                self.server.uids.append(event[1])
+                self.lines.append(f'* {len(self.server.uids)} EXISTS'.encode())
+            else:
+                self.timeout_pending = True
+        elif data == b'DONE\r\n':
+            self.lines.append(self.idle_tag + b' OK IDLE terminated')
+    
+    def readline(self):
+        if not self.lines and self.timeout_pending:
+            self.timeout_pending = False
+            raise socket.timeout()
+        return self.lines.pop(0) + b'\r\n'
+
+
+class IdleLoopTest(unittest.TestCase):
+    """Tests for EmailMonitor.idle_loop."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        config = {
+            'email': {
+                'imap_server': 'imap.example.com',
+                'imap_port': 993,
+                'use_ssl': True,
+                'username': 'parent@example.com',
+                'password': 'secret',
+                'sender_email': 'school@example.com',
+                'subject_keywords': ['[Westshore Montessori School ]'],
+            },
+            'downloads': {'temp_folder': self.temp_dir.name},
+        }
+        self.monitor = EmailMonitor(config, cache_file=os.path.join(self.temp_dir.name, 'cache.json'))
+        self.monitor.download_attachments = self.fake_download
+        self.addCleanup(self.monitor._forget_mail)
+        
+        # UIDs whose download fails the next time it is attempted
+        self.failing_downloads = set()
+        self.downloads = []
+        # Return values of the upload callback, one per call; True once they run out
+        self.upload_results = []
+        self.uploads = []
+        
+        sleep_patch = mock.patch.object(email_monitor.time, 'sleep')
+        self.sleep = sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+    
+    def fake_download(self, mail, email_ids, prefetched=None, dest_folder=None, files_by_email=None):
+        self.downloads.append(list(email_ids))
+        downloaded_files = []
+        for email_id in email_ids:
+            if email_id in self.failing_downloads:
+                self.failing_downloads.discard(email_id)
+                continue
+            files = [f'{email_id}_photo.jpg']
+            files_by_email[email_id] = files
+            downloaded_files.extend(files)
+        return downloaded_files
+    
+    def fake_upload(self, downloaded_files, files_by_email):
+        self.uploads.append(sorted(files_by_email))
+        return self.upload_results.pop(0) if self.upload_results else True
+    
+    def run_loop(self, server, start_uid=None):
+        with mock.patch.object(email_monitor, '_IMAP4_SSL', side_effect=server.connect):
+            with self.assertRaises(StopWatching):
+                self.monitor.idle_loop(on_new_photos=self.fake_upload, start_uid=start_uid)
+    
+    def test_only_new_emails_are_handled_without_start_uid(self):
+        server = FakeServer(uids=[5, 6], events=[('mail', 7)])
+        
+        self.run_loop(server)
+        
+        self.assertEqual(self.uploads, [['7']])
+    
+    def test_emails_above_start_uid_are_handled_before_idling(self):
+        # 6 and 7 arrived while the initial run was busy, so no IDLE announces them
+        server = FakeServer(uids=[5, 6, 7], events=[])
+        
+        self.run_loop(server, start_uid=5)
+        
+        self.assertEqual(self.uploads, [['6', '7']])
+    
+    def test_failed_upload_is_retried_after_next_idle(self):
+        server = FakeServer(uids=[5], events=[('mail', 6), ('timeout',), ('mail', 7)])
+        self.upload_results = [False]
+        
+        self.run_loop(server)
+        
+        self.assertEqual(self.uploads, [['6'], ['6'], ['7']])
+    
+    def test_failed_download_is_retried_after_next_idle(self):
+        server = FakeServer(uids=[5], events=[('mail', 6), ('timeout',)])
+        self.failing_downloads = {'6'}
+        
+        self.run_loop(server)
+        
+        self.assertEqual(self.downloads, [['6'], ['6']])
+        self.assertEqual(self.uploads, [['6']])
+    
+    def test_handled_emails_are_not_searched_again(self):
+        server = FakeServer(uids=[5], events=[('mail', 6), ('timeout',), ('mail', 7)])
+        
+        self.run_loop(server)
+        
+        self.assertEqual(self.downloads, [['6'], ['7']])
+    
+    def test_server_error_reconnects_instead_of_stopping(self):
+        server = FakeServer(uids=[5], events=[('reject',), ('mail', 6)])
+        
+        self.run_loop(server)
+        
+        self.assertEqual(len(server.connections), 2)
+        self.assertTrue(server.connections[0].logged_out)
+        self.assertIs(self.monitor._mail, server.connections[1])
+        self.sleep.assert_called_with(60)
+        self.assertEqual(self.uploads, [['6']])
+
+
+if __name__ == '__main__':
+    unittest.main()